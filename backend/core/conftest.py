@@ -0,0 +1,11 @@
+def pytest_configure(config):
+    from django.conf import settings
+
+    # The shipped cache is shared on disk; tests keep theirs in memory so
+    # runs never see each other's entries.
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'savannah-tests',
+        }
+    }
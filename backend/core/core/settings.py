@@ -2,6 +2,7 @@
 from pathlib import Path
 from datetime import timedelta
 import os
+import tempfile
 from dotenv import load_dotenv 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -153,13 +154,44 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'products.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=5),
 }
 
+# Keyset pagination for product, order and category listings
+PRODUCTS_PAGE_SIZE = int(os.getenv('PRODUCTS_PAGE_SIZE', 20))
+PRODUCTS_MAX_PAGE_SIZE = int(os.getenv('PRODUCTS_MAX_PAGE_SIZE', 100))
+# Rows fetched per database round trip when streaming large lists
+PRODUCTS_STREAM_CHUNK_SIZE = int(os.getenv('PRODUCTS_STREAM_CHUNK_SIZE', 2000))
+
+# Maximum number of patches accepted by the bulk product update endpoint
+PRODUCTS_BULK_UPDATE_LIMIT = int(os.getenv('PRODUCTS_BULK_UPDATE_LIMIT', 1000))
+# Maximum number of orders moved by one bulk status transition
+PRODUCTS_BULK_STATUS_LIMIT = int(os.getenv('PRODUCTS_BULK_STATUS_LIMIT', 1000))
+
+# Threads for background jobs such as image resizing (0 runs them inline)
+PRODUCTS_BACKGROUND_WORKERS = int(os.getenv('PRODUCTS_BACKGROUND_WORKERS', 2))
+
+# Delivered and cancelled orders untouched for this many days are archived
+PRODUCTS_ARCHIVE_AFTER_DAYS = int(os.getenv('PRODUCTS_ARCHIVE_AFTER_DAYS', 180))
+# Orders moved to the archive tables per transaction
+PRODUCTS_ARCHIVE_BATCH_SIZE = int(os.getenv('PRODUCTS_ARCHIVE_BATCH_SIZE', 500))
+
+# Seconds an Idempotency-Key response is kept and replayed
+PRODUCTS_IDEMPOTENCY_TTL = int(os.getenv('PRODUCTS_IDEMPOTENCY_TTL', 60 * 60 * 24))
+# Seconds a duplicate request waits for the in-flight one before a 409
+PRODUCTS_IDEMPOTENCY_WAIT = int(os.getenv('PRODUCTS_IDEMPOTENCY_WAIT', 10))
+
+# Lower bounds of the price bands returned by the product facets endpoint
+PRODUCTS_PRICE_BUCKETS = [0, 500, 1000, 5000, 10000]
+
 GOOGLE_OAUTH_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
 GOOGLE_OAUTH_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
 
@@ -263,6 +295,23 @@ SWAGGER_SETTINGS = {
     'DEFAULT_AUTO_SCHEMA_CLASS': 'drf_yasg.inspectors.SwaggerAutoSchema',
 }
 
+# Any Django cache backend works for the versioned catalogue cache, as
+# long as every worker shares it: a version bump has to reach all gunicorn
+# workers, or one of them keeps serving the old category tree and ETags.
+# The default file-based cache is shared by every worker on the host; use
+# Redis when running on several hosts. Tests switch to locmem (conftest.py).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'savannah-catalogue')
+        ),
+    }
+}
+
+# Seconds cached catalogue data is kept before it expires on its own
+PRODUCTS_CACHE_TIMEOUT = int(os.getenv('PRODUCTS_CACHE_TIMEOUT', 60 * 15))
+
 # CACHES = {
 #     "default": {
 #         "BACKEND": "django_redis.cache.RedisCache",
@@ -1,8 +1,9 @@
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from products.views import serve_product_media
 
 # Swagger/ReDoc - API Documentation
 from drf_yasg.views import get_schema_view
@@ -32,7 +33,12 @@ urlpatterns = [
 
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='redoc'),
-    
+
+    # Product media, with immutable caching for content-hashed files
+    re_path(
+        rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>products/.+)$",
+        serve_product_media, name='product-media'
+    ),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,105 @@
+"""
+Archival of finished orders.
+
+Delivered and cancelled orders that have not changed for
+``PRODUCTS_ARCHIVE_AFTER_DAYS`` are moved from ``Order``/``OrderItem``
+into ``ArchivedOrder``/``ArchivedOrderItem``, keeping their ids, so the
+live tables and their indexes only hold recent and open orders.
+Listings read through to the archive on request (``include_archived``).
+
+Design:
+- Orders are moved in primary key order, one batch per transaction: the
+  batch is locked, copied with ``bulk_create`` and deleted. Readers see
+  each order in exactly one of the two tables.
+- Progress is an ``OrderArchiveRun`` row saved in the same transaction as
+  each batch, so a run that is interrupted resumes after the last batch
+  that committed, with the same cutoff.
+- Archiving does not change the sales rollups: archived orders are still
+  sales, and ``rebuild_sales_rollups`` reads both tables.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderArchiveRun, OrderItem
+
+TERMINAL_STATUSES = ('D', 'X')
+
+ORDER_COLUMNS = ('id', 'customer_id', 'created_at', 'updated_at', 'status', 'shipping_address', 'total')
+ITEM_COLUMNS = ('id', 'order_id', 'product_id', 'quantity', 'price')
+
+
+def default_cutoff():
+    """
+    Return the time before which finished orders are archived.
+    """
+    return timezone.now() - timedelta(days=settings.PRODUCTS_ARCHIVE_AFTER_DAYS)
+
+
+def archivable_orders(cutoff, after_id=0):
+    """
+    Return the finished orders last changed before ``cutoff``.
+    """
+    return Order.objects.filter(
+        status__in=TERMINAL_STATUSES, updated_at__lt=cutoff, pk__gt=after_id
+    )
+
+
+def count_archivable(cutoff, after_id=0):
+    """
+    Return ``(orders, items)`` that a run with ``cutoff`` would move.
+    """
+    orders = archivable_orders(cutoff, after_id)
+    counts = orders.aggregate(orders=Count('id', distinct=True), items=Count('items'))
+    return counts['orders'], counts['items']
+
+
+def archive_batch(run, batch_size):
+    """
+    Move the next batch of ``run`` into the archive tables.
+
+    Returns the number of orders moved; 0 once the run is complete.
+    """
+    with transaction.atomic():
+        ids = list(
+            archivable_orders(run.cutoff, run.last_order_id)
+            .select_for_update()
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        ArchivedOrder.objects.bulk_create(
+            ArchivedOrder(**row) for row in Order.objects.filter(pk__in=ids).values(*ORDER_COLUMNS)
+        )
+        items = OrderItem.objects.filter(order__in=ids)
+        archived_items = ArchivedOrderItem.objects.bulk_create(
+            ArchivedOrderItem(**row) for row in items.values(*ITEM_COLUMNS)
+        )
+        items.delete()
+        Order.objects.filter(pk__in=ids).delete()
+
+        run.last_order_id = ids[-1]
+        run.orders += len(ids)
+        run.items += len(archived_items)
+        run.save(update_fields=['last_order_id', 'orders', 'items'])
+    return len(ids)
+
+
+def start_run(cutoff=None):
+    """
+    Return the unfinished run to resume, or a new one for ``cutoff``.
+
+    Returns ``(run, resumed)``.
+    """
+    run = OrderArchiveRun.objects.filter(finished_at__isnull=True).order_by('-pk').first()
+    if run is not None:
+        return run, True
+    return OrderArchiveRun.objects.create(cutoff=cutoff or default_cutoff()), False
+
+
+def finish_run(run):
+    run.finished_at = timezone.now()
+    run.save(update_fields=['finished_at'])
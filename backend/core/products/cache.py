@@ -0,0 +1,140 @@
+"""
+Versioned cache helpers for the products app.
+
+Cached catalogue data is stored under keys that embed a per-namespace
+version number. Writers bump the version instead of hunting down and
+deleting individual keys, so every entry built from older data simply
+stops being read and expires on its own.
+
+Design:
+- Only plain get/set/add/incr cache operations are used, so any Django
+  cache backend works, including locmem and file-based ones.
+- Versions are seeded from the clock, so losing a version key can never
+  rewind it to a number that older entries were stored under.
+"""
+
+import functools
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+CACHE_TIMEOUT = getattr(settings, 'PRODUCTS_CACHE_TIMEOUT', 60 * 60)
+
+# Cache namespaces
+CATEGORY_TREE = 'category-tree'
+PRODUCTS = 'products'
+
+
+def _version_key(namespace):
+    return f'products:version:{namespace}'
+
+
+def _seed():
+    return int(time.time() * 1000)
+
+
+def get_version(namespace):
+    """
+    Return the current version number of a cache namespace.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _incr_version(namespace):
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _seed(), timeout=None)
+
+
+def bump_version(*namespaces):
+    """
+    Invalidate everything cached under the given namespaces.
+
+    The version is bumped straight away so the writer never reads its own
+    stale data, and once more when the surrounding transaction commits so
+    a concurrent reader cannot keep pre-commit rows cached under the new
+    version.
+    """
+    for namespace in namespaces:
+        _incr_version(namespace)
+
+    def bump_on_commit():
+        for namespace in namespaces:
+            _incr_version(namespace)
+
+    transaction.on_commit(bump_on_commit)
+
+
+def versioned_key(namespaces, *parts):
+    """
+    Build a cache key tied to the current version of one or more namespaces.
+    """
+    if isinstance(namespaces, str):
+        namespaces = (namespaces,)
+    versions = '.'.join(str(get_version(namespace)) for namespace in namespaces)
+    suffix = ':'.join(str(part) for part in parts)
+    return f"products:{'+'.join(namespaces)}:{versions}:{suffix}"
+
+
+def query_fingerprint(request):
+    """
+    Return a short, order-independent digest of a request's query string.
+    """
+    items = sorted(request.query_params.lists())
+    return hashlib.md5(repr(items).encode('utf-8')).hexdigest()
+
+
+def cache_anonymous_get(*namespaces):
+    """
+    Cache the responses of a read-only GET handler for anonymous clients.
+
+    Responses are stored under the versions of ``namespaces``, so any
+    write that bumps one of them makes every stale entry unreachable at
+    once. Authenticated requests always bypass the cache, so staff never
+    read back stale data after their own writes. Cached ETag and
+    Last-Modified headers are replayed, and conditional requests are
+    answered straight from the cache.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return handler(view, request, *args, **kwargs)
+
+            key = versioned_key(
+                namespaces, 'response', request.scheme, request.get_host(),
+                request.path, query_fingerprint(request),
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                data, headers = cached
+                last_modified = parse_http_date_safe(headers.get('Last-Modified', ''))
+                response = get_conditional_response(
+                    request, etag=headers.get('ETag'), last_modified=last_modified
+                ) or Response(data)
+                for header, value in headers.items():
+                    response[header] = value
+                return response
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200 and getattr(response, 'data', None) is not None:
+                headers = {
+                    header: response[header]
+                    for header in ('ETag', 'Last-Modified') if header in response
+                }
+                cache.set(key, (response.data, headers), CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,137 @@
+"""
+Turning a customer's cart into an order.
+
+Design:
+- Checkout is one transaction. The cart row is locked first, so two
+  checkouts of the same cart run one after the other, then the cart's
+  products are locked in primary key order. Every checkout takes its
+  product locks in the same order, so concurrent checkouts of
+  overlapping carts queue up instead of deadlocking.
+- Stock is taken with a single ``UPDATE ... SET stock = CASE ...
+  WHERE stock >= quantity`` built from ``F()`` expressions, so it can
+  never be oversold even by a writer that skips the locks; the same
+  statement marks products that sell out as unavailable, and the
+  ``product_stock_non_negative`` constraint backs this up in the
+  database. The order items are written with one ``bulk_create`` and
+  the cart is emptied with one ``DELETE``. The sales rollups are
+  updated last, see products.rollups. The number of queries does not
+  depend on the size of the cart.
+- Notifications go out on the background pool once the transaction
+  commits, so a rolled-back checkout never sends any.
+"""
+
+import logging
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from .cache import PRODUCTS, bump_version
+from .models import Cart, CartItem, Order, OrderItem, Product
+from .notifications import send_order_notifications
+from .rollups import record_order
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutError(Exception):
+    """
+    A cart that cannot be checked out; the message is safe to show.
+    """
+
+
+def take_stock(lines):
+    """
+    Take ``{product_id: quantity}`` from stock in one conditional UPDATE.
+
+    A product is only decremented if it still has enough stock, and is
+    marked unavailable when its stock reaches zero. Returns False if any
+    product could not be decremented; the caller must then roll back, as
+    the others were.
+    """
+    enough = Q()
+    for pk, quantity in lines.items():
+        enough |= Q(pk=pk, stock__gte=quantity)
+    updated = Product.objects.filter(enough).update(
+        stock=Case(*[When(pk=pk, then=F('stock') - quantity) for pk, quantity in lines.items()]),
+        # Compared with the stock before this update.
+        available=Case(
+            *[When(pk=pk, stock=quantity, then=Value(False)) for pk, quantity in lines.items()],
+            default=F('available'),
+        ),
+        # update() skips auto_now; incremental exports rely on updated_at.
+        updated_at=timezone.now(),
+    )
+    bump_version(PRODUCTS)
+    return updated == len(lines)
+
+
+def reserve_stock(lines):
+    """
+    Lock the products of ``{product_id: quantity}`` and take their stock.
+
+    Must run inside a transaction. Returns the locked products in primary
+    key order; raises CheckoutError naming the products that are short.
+    """
+    products = list(
+        Product.objects.select_for_update()
+        .filter(pk__in=lines)
+        .order_by('pk')
+        .only('id', 'name', 'price', 'stock', 'available')
+    )
+    # The locked rows spare a doomed UPDATE; the UPDATE is the guarantee.
+    short = [p.name for p in products if not p.available or p.stock < lines[p.pk]]
+    if short or not take_stock(lines):
+        names = short or [p.name for p in products]
+        raise CheckoutError(f"Not enough stock for: {', '.join(names)}")
+    return products
+
+
+def checkout(cart, shipping_address, notify=True):
+    """
+    Create an order from ``cart``, take its stock and empty it.
+
+    The order notifications are sent unless ``notify`` is False.
+
+    Raises CheckoutError if the cart is empty or a product cannot be sold
+    in the requested quantity; nothing is written in that case.
+    """
+    with transaction.atomic():
+        Cart.objects.select_for_update().only('id').get(pk=cart.pk)
+        lines = dict(CartItem.objects.filter(cart=cart).values_list('product_id', 'quantity'))
+        if not lines:
+            raise CheckoutError("Your cart is empty")
+        products = reserve_stock(lines)
+
+        items = [
+            OrderItem(product=p, quantity=lines[p.pk], price=p.price * lines[p.pk])
+            for p in products
+        ]
+        order = Order.objects.create(
+            customer=cart.customer,
+            shipping_address=shipping_address,
+            status='P',
+            total=sum((item.price for item in items), Decimal('0')),
+        )
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
+        CartItem.objects.filter(cart=cart).delete()
+        # Last, as every checkout updates the same daily row.
+        record_order(order, items)
+
+        logger.info(
+            f"Order #{order.id} created from cart {cart.id}",
+            extra={
+                'order_id': order.id,
+                'cart_id': cart.id,
+                'total': order.total,
+                'item_count': len(items),
+                'cart_items': [
+                    {'product_id': pk, 'quantity': quantity} for pk, quantity in lines.items()
+                ],
+            }
+        )
+        if notify:
+            run_in_background(send_order_notifications, order)
+    return order
@@ -0,0 +1,72 @@
+"""
+Conditional GET support for catalogue endpoints.
+
+Validators are computed before anything is serialized, so a client that
+already holds the current representation gets ``304 Not Modified``
+without the serializer ever running:
+
+- Product lists: ``MAX(updated_at)`` and ``COUNT(*)`` over the filtered
+  queryset, in one aggregate query. No Last-Modified is sent because a
+  deleted row does not move ``MAX(updated_at)``.
+- Product details: the product's ``updated_at``, sent as both ETag and
+  Last-Modified.
+- Categories: a digest of the cached category tree.
+
+Every ETag also includes the products cache version, which moves when
+category assignments change without touching ``updated_at``, including
+when a category is deleted or moved (see products.signals).
+"""
+
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .cache import PRODUCTS, get_version, query_fingerprint
+
+
+def make_etag(*parts):
+    """
+    Build a quoted strong ETag from any number of repr-able parts.
+    """
+    return quote_etag(hashlib.md5(repr(parts).encode('utf-8')).hexdigest())
+
+
+def product_list_etag(request, queryset):
+    """
+    Return the ETag of a filtered product list.
+    """
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    return make_etag(
+        'products', stats['last_modified'], stats['count'],
+        get_version(PRODUCTS), query_fingerprint(request),
+    )
+
+
+def product_detail_etag(request, updated_at):
+    """
+    Return the ETag of a single product.
+    """
+    return make_etag('product', updated_at, get_version(PRODUCTS), query_fingerprint(request))
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Return a 304 (or 412) response if the client's copy is still current.
+
+    Returns None when the full response has to be built.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Attach ETag and Last-Modified headers to a response.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,147 @@
+"""
+Streaming CSV and NDJSON exports of products and orders.
+
+Rows are read with ``.iterator(chunk_size=...)``, which walks a
+server-side cursor on PostgreSQL, and written out one line at a time, so
+an export of any size runs in constant memory. Exports are ordered by
+``(updated_at, id)``: an incremental export passes the largest
+``updated_at`` it has seen as ``since`` and gets every row changed from
+that moment on.
+
+- products: one line per product; ``categories`` holds the category ids.
+- orders: one line per order item, with the order's columns repeated on
+  every line. An order without items gives one line with empty item
+  columns. Live and archived orders are read with one ``UNION ALL``, so
+  the dump covers every order whichever table it is in.
+"""
+
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import F
+from .models import ArchivedOrder, Category, Order, Product
+
+PRODUCT_COLUMNS = (
+    'id', 'name', 'description', 'price', 'stock', 'available', 'categories',
+    'created_at', 'updated_at',
+)
+ORDER_COLUMNS = (
+    'id', 'customer', 'status', 'shipping_address', 'total', 'created_at', 'updated_at',
+    'item_id', 'product', 'quantity', 'price',
+)
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def iter_chunks(iterable, size):
+    """
+    Group an iterable into lists of at most ``size`` items.
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def product_rows(since=None, chunk_size=None):
+    """
+    Yield every product (changed at or after ``since``) as a plain dict.
+    """
+    chunk_size = chunk_size or settings.PRODUCTS_STREAM_CHUNK_SIZE
+    queryset = Product.objects.order_by('updated_at', 'id')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    columns = [column for column in PRODUCT_COLUMNS if column != 'categories']
+    rows = queryset.values(*columns).iterator(chunk_size=chunk_size)
+    for chunk in iter_chunks(rows, chunk_size):
+        categories = {}
+        pairs = Category.objects.filter(
+            product__in=[row['id'] for row in chunk]
+        ).values_list('product', 'id')
+        for product_id, category_id in pairs:
+            categories.setdefault(product_id, []).append(category_id)
+        for row in chunk:
+            row['categories'] = categories.get(row['id'], [])
+            yield {column: _plain(row[column]) for column in PRODUCT_COLUMNS}
+
+
+def order_rows(since=None, chunk_size=None):
+    """
+    Yield one plain dict per order item of every order, live or archived,
+    changed at or after ``since``.
+    """
+    chunk_size = chunk_size or settings.PRODUCTS_STREAM_CHUNK_SIZE
+    querysets = []
+    for model in (Order, ArchivedOrder):
+        queryset = model.objects.all()
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        querysets.append(queryset.values(
+            'id', 'customer', 'status', 'shipping_address', 'total', 'created_at', 'updated_at',
+            item_id=F('items__id'), product=F('items__product'),
+            quantity=F('items__quantity'), price=F('items__price'),
+        ).order_by())
+    live, archived = querysets
+    rows = live.union(archived, all=True).order_by(
+        'updated_at', 'id', 'item_id'
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield {column: _plain(row[column]) for column in ORDER_COLUMNS}
+
+
+EXPORTS = {
+    'products': (PRODUCT_COLUMNS, product_rows),
+    'orders': (ORDER_COLUMNS, order_rows),
+}
+
+
+class _Echo:
+    """
+    File-like object that hands back what ``csv.writer`` writes to it.
+    """
+    def write(self, value):
+        return value
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([
+            '|'.join(str(value) for value in row[column])
+            if isinstance(row[column], list) else row[column]
+            for column in columns
+        ])
+
+
+def _ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def export_lines(dataset, output, since=None, chunk_size=None):
+    """
+    Return an iterator over the lines of an export.
+
+    ``dataset`` is a key of ``EXPORTS`` and ``output`` a key of ``FORMATS``.
+    """
+    columns, rows = EXPORTS[dataset]
+    writer = _csv_lines if output == 'csv' else _ndjson_lines
+    return writer(columns, rows(since=since, chunk_size=chunk_size))
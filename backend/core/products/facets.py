@@ -0,0 +1,135 @@
+"""
+Facet counts for catalogue browsing.
+
+Category counts are rolled up through the MPTT tree: each product's
+categories are joined to all of their ancestors on the
+``(tree_id, lft, rght)`` range and products are counted DISTINCT per
+ancestor, so a product filed under two sibling categories still counts
+once for the parent. Price bands are assigned with a CASE expression.
+Both are grouped aggregations over the same filtered product set and go
+to the database as one UNION ALL statement.
+"""
+
+from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from .models import Category, Product
+
+FACETS = ('category', 'price')
+
+DEFAULT_PRICE_BUCKETS = (0, 500, 1000, 5000, 10000)
+
+
+def get_price_buckets():
+    """
+    Return the lower bounds of the price bands, in ascending order.
+    """
+    bounds = getattr(settings, 'PRODUCTS_PRICE_BUCKETS', DEFAULT_PRICE_BUCKETS)
+    return [Decimal(str(bound)) for bound in bounds]
+
+
+def _category_sql(qn, base_sql):
+    through = Product.categories.through._meta
+    category = Category._meta
+    product_col = qn(through.get_field('product').column)
+    category_col = qn(through.get_field('category').column)
+    return (
+        f"SELECT 'category' AS facet, ancestor.{qn('id')} AS facet_key, "
+        f"COUNT(DISTINCT pc.{product_col}) AS facet_count "
+        f"FROM {qn(through.db_table)} pc "
+        f"INNER JOIN {qn(category.db_table)} c ON c.{qn('id')} = pc.{category_col} "
+        f"INNER JOIN {qn(category.db_table)} ancestor "
+        f"ON ancestor.{qn('tree_id')} = c.{qn('tree_id')} "
+        f"AND ancestor.{qn('lft')} <= c.{qn('lft')} "
+        f"AND ancestor.{qn('rght')} >= c.{qn('rght')} "
+        f"WHERE pc.{product_col} IN ({base_sql}) "
+        f"GROUP BY ancestor.{qn('id')}"
+    )
+
+
+def _price_sql(qn, base_sql, buckets):
+    price = qn(Product._meta.get_field('price').column)
+    whens = ' '.join(
+        f"WHEN p.{price} < %s THEN {index}" for index in range(len(buckets) - 1)
+    )
+    bucket = f"CASE {whens} ELSE {len(buckets) - 1} END" if whens else '0'
+    return (
+        f"SELECT 'price' AS facet, banded.bucket AS facet_key, COUNT(*) AS facet_count "
+        f"FROM (SELECT {bucket} AS bucket FROM {qn(Product._meta.db_table)} p "
+        f"WHERE p.{qn('id')} IN ({base_sql})) banded "
+        f"GROUP BY banded.bucket"
+    )
+
+
+def count_facets(queryset, facets=FACETS):
+    """
+    Count the products in ``queryset`` per category and per price band.
+
+    Returns ``({category_id: count}, {bucket_index: count})``. Category
+    counts include every product filed under the category's descendants.
+    """
+    category_counts = {}
+    price_counts = {}
+    try:
+        base_sql, base_params = queryset.order_by().values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        return category_counts, price_counts
+
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    buckets = get_price_buckets()
+
+    parts = []
+    params = []
+    if 'category' in facets:
+        parts.append(_category_sql(qn, base_sql))
+        params.extend(base_params)
+    if 'price' in facets:
+        parts.append(_price_sql(qn, base_sql, buckets))
+        params.extend(buckets[1:])
+        params.extend(base_params)
+    if not parts:
+        return category_counts, price_counts
+
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(parts), params)
+        for facet, key, count in cursor.fetchall():
+            if facet == 'category':
+                category_counts[key] = count
+            else:
+                price_counts[int(key)] = count
+    return category_counts, price_counts
+
+
+def build_facets(queryset, nodes, facets=FACETS):
+    """
+    Return the facet payload for ``queryset``.
+
+    ``nodes`` is the category tree from ``products.tree``; it supplies the
+    names and the tree order of the category facet.
+    """
+    category_counts, price_counts = count_facets(queryset, facets)
+    data = {}
+    if 'category' in facets:
+        data['categories'] = [
+            {
+                'id': node['id'],
+                'name': node['name'],
+                'parent': node['parent'],
+                'count': category_counts[node['id']],
+            }
+            for node in nodes.values() if node['id'] in category_counts
+        ]
+    if 'price' in facets:
+        buckets = get_price_buckets()
+        upper_bounds = buckets[1:] + [None]
+        data['price'] = [
+            {
+                'min': str(lower),
+                'max': str(upper) if upper is not None else None,
+                'count': price_counts.get(index, 0),
+            }
+            for index, (lower, upper) in enumerate(zip(buckets, upper_bounds))
+        ]
+    return data
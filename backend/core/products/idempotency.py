@@ -0,0 +1,133 @@
+"""
+Idempotency keys for POST handlers that create orders.
+
+A client sends a unique ``Idempotency-Key`` header with a request and
+the same header with every retry of it. The first request to arrive
+claims the key by inserting an ``IdempotencyKey`` row, runs, and stores
+its response on the row; any repeat within
+``PRODUCTS_IDEMPOTENCY_TTL`` gets that response back, marked with an
+``Idempotent-Replayed`` header, without the handler running again.
+
+Design:
+- The key is claimed with a plain INSERT against the ``(user, key)``
+  unique constraint, so exactly one of several concurrent duplicates
+  wins. The claim, the handler and the stored response share one
+  transaction: a worker that crashes mid-request leaves no claim behind,
+  and duplicates wait on the unique index until the winner commits or
+  rolls back. Claims left in flight are polled until they complete, and
+  given up on with a 409 after ``PRODUCTS_IDEMPOTENCY_WAIT`` seconds.
+- Keys are scoped to the user, so one client can never replay another
+  client's response.
+- Reusing a key for a different request is answered with a 422 rather
+  than a replay of the unrelated response.
+- Server errors are not stored: the transaction is rolled back, with
+  the claim, so a retry can run the request again.
+- Expired rows are replaced on the next use of their key and removed in
+  bulk by ``purge_idempotency_keys``.
+"""
+
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+# Seconds between checks on an in-flight duplicate
+POLL_INTERVAL = 0.1
+
+
+def request_fingerprint(request):
+    """
+    Return a digest of a request's method, path and parsed body.
+    """
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    payload = f'{request.method} {request.path}\n{body}'
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def expired_before():
+    """
+    Return the creation time before which a stored key has expired.
+    """
+    return timezone.now() - timedelta(seconds=settings.PRODUCTS_IDEMPOTENCY_TTL)
+
+
+def claim_key(user, key, fingerprint):
+    """
+    Claim ``key`` for a new request.
+
+    Returns ``(record, True)`` if this request claimed it, ``(record,
+    False)`` if another request holds it, and ``(None, False)`` if that
+    request released it before it could be read.
+    """
+    IdempotencyKey.objects.filter(user=user, key=key, created_at__lt=expired_before()).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint)
+        return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+def replay(record, fingerprint):
+    """
+    Return the stored response of a completed request.
+    """
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"error": f"This {IDEMPOTENCY_HEADER} was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(record.response, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+def idempotent(handler):
+    """
+    Make a POST handler replay its response for repeated Idempotency-Keys.
+
+    Requests without the header, and anonymous ones, are handled as usual.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return Response(
+                {"error": f"{IDEMPOTENCY_HEADER} is too long"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+        deadline = time.monotonic() + settings.PRODUCTS_IDEMPOTENCY_WAIT
+        while True:
+            with transaction.atomic():
+                record, claimed = claim_key(request.user, key, fingerprint)
+                if claimed:
+                    response = handler(view, request, *args, **kwargs)
+                    if response.status_code >= 500:
+                        transaction.set_rollback(True)
+                        return response
+                    record.status_code = response.status_code
+                    record.response = response.data
+                    record.completed_at = timezone.now()
+                    record.save(update_fields=['status_code', 'response', 'completed_at'])
+                    return response
+            if record is not None and record.completed_at is not None:
+                return replay(record, fingerprint)
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"error": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            time.sleep(POLL_INTERVAL)
+    return wrapper
@@ -0,0 +1,153 @@
+"""
+Resized variants of product images.
+
+Every uploaded image is rendered at a few fixed sizes in WebP and JPEG
+and stored under a name derived from the SHA-256 of the variant's bytes,
+so a stored variant never changes and can be cached forever, and equal
+variants are stored once. The stored names are recorded on
+``Product.image_variants``:
+
+    {
+        "source": "products/shoe.png",
+        "sizes": [
+            {"name": "thumbnail", "width": 150, "height": 100,
+             "webp": "products/variants/<hash>.webp",
+             "jpeg": "products/variants/<hash>.jpg"},
+            ...
+        ]
+    }
+
+``render_variants`` only depends on Pillow, so it can run in a worker
+process; reading the original, storing variants and updating the
+product happen in the caller.
+"""
+
+import hashlib
+import logging
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from .cache import PRODUCTS, bump_version
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels of each variant, smallest first
+VARIANTS = getattr(settings, 'PRODUCTS_IMAGE_VARIANTS', {
+    'thumbnail': 150,
+    'card': 400,
+    'detail': 1000,
+})
+
+VARIANT_DIR = 'products/variants'
+
+# Pillow format, file extension and save options per output format
+OUTPUT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def render_variants(data):
+    """
+    Render every variant of an encoded image.
+
+    Returns a list of ``(name, width, height, {format: bytes})``. Images are
+    never upscaled, so a small original gives variants of its own size.
+    """
+    rendered = []
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        for name, size in VARIANTS.items():
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+            encoded = {}
+            for output, (pil_format, _, options) in OUTPUT_FORMATS.items():
+                buffer = BytesIO()
+                frame = variant.convert('RGB') if pil_format == 'JPEG' else variant
+                frame.save(buffer, pil_format, **options)
+                encoded[output] = buffer.getvalue()
+            rendered.append((name, variant.width, variant.height, encoded))
+    return rendered
+
+
+def store_variants(source, rendered, storage):
+    """
+    Save rendered variants under content-hashed names.
+
+    Returns the ``image_variants`` value for a product whose image is
+    ``source``.
+    """
+    sizes = []
+    for name, width, height, encoded in rendered:
+        size = {'name': name, 'width': width, 'height': height}
+        for output, content in encoded.items():
+            extension = OUTPUT_FORMATS[output][1]
+            digest = hashlib.sha256(content).hexdigest()
+            path = f'{VARIANT_DIR}/{digest}.{extension}'
+            if not storage.exists(path):
+                path = storage.save(path, ContentFile(content))
+            size[output] = path
+        sizes.append(size)
+    return {'source': source, 'sizes': sizes}
+
+
+def save_variants(product_id, source, variants):
+    """
+    Record the variants of a product, unless its image changed meanwhile.
+    """
+    updated = Product.objects.filter(pk=product_id, image=source).update(image_variants=variants)
+    if updated:
+        # update() sends no signals.
+        bump_version(PRODUCTS)
+    return bool(updated)
+
+
+def process_product_image(product_id, force=False):
+    """
+    Render, store and record the variants of one product's image.
+
+    Returns True if new variants were recorded.
+    """
+    product = Product.objects.only('id', 'image', 'image_variants').filter(pk=product_id).first()
+    if product is None or not product.image:
+        return False
+    source = product.image.name
+    if not force and (product.image_variants or {}).get('source') == source:
+        return False
+    with product.image.open('rb') as handle:
+        data = handle.read()
+    variants = store_variants(source, render_variants(data), product.image.storage)
+    saved = save_variants(product_id, source, variants)
+    if saved:
+        logger.info(
+            f"Generated image variants for product #{product_id}",
+            extra={'product_id': product_id, 'source': source}
+        )
+    return saved
+
+
+def build_srcset(variants, url):
+    """
+    Return ``{format: srcset}`` for stored variants, or None if there are none.
+
+    ``url`` turns a storage name into the URL to publish. Variants with
+    the same width as a smaller one are left out.
+    """
+    sizes = (variants or {}).get('sizes')
+    if not sizes:
+        return None
+    srcset = {}
+    for output in OUTPUT_FORMATS:
+        entries = []
+        widths = set()
+        for size in sizes:
+            if output not in size or size['width'] in widths:
+                continue
+            widths.add(size['width'])
+            entries.append(f"{url(size[output])} {size['width']}w")
+        srcset[output] = ', '.join(entries)
+    return srcset
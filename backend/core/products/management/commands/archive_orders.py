@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from products.archive import archive_batch, count_archivable, finish_run, start_run
+from products.models import OrderArchiveRun
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered and cancelled orders that have not changed for a while "
+        "into the archive tables, in batches. An interrupted run is resumed "
+        "where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.PRODUCTS_ARCHIVE_AFTER_DAYS,
+            help="Archive orders last changed more than this many days ago "
+                 f"(default: {settings.PRODUCTS_ARCHIVE_AFTER_DAYS}).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.PRODUCTS_ARCHIVE_BATCH_SIZE,
+            help=f"Orders moved per transaction (default: {settings.PRODUCTS_ARCHIVE_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help="Stop after this many batches; the next run resumes from there.",
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help="Seconds to wait between batches to spread the load (default: 0).",
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help="Abandon an unfinished run and start a new one.",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report how many orders and items would be archived without moving any.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        unfinished = OrderArchiveRun.objects.filter(finished_at__isnull=True)
+
+        if options['dry_run']:
+            run = None if options['restart'] else unfinished.order_by('-pk').first()
+            if run is not None:
+                cutoff = run.cutoff
+            orders, items = count_archivable(cutoff, run.last_order_id if run else 0)
+            batches = -(-orders // options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Would archive {orders} orders and {items} items changed before "
+                f"{cutoff:%Y-%m-%d %H:%M} in {batches} batches"
+            ))
+            return
+
+        if options['restart']:
+            unfinished.update(finished_at=timezone.now())
+        run, resumed = start_run(cutoff)
+        if resumed:
+            self.stdout.write(
+                f"Resuming run #{run.pk} after order #{run.last_order_id} "
+                f"({run.orders} orders archived so far, cutoff {run.cutoff:%Y-%m-%d %H:%M})"
+            )
+
+        started = time.perf_counter()
+        batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            if batches and options['pause']:
+                time.sleep(options['pause'])
+            moved = archive_batch(run, options['batch_size'])
+            if not moved:
+                finish_run(run)
+                break
+            batches += 1
+            self.stdout.write(f"Batch {batches}: archived up to order #{run.last_order_id}")
+
+        state = "finished" if run.finished_at else "paused, run again to resume"
+        self.stdout.write(self.style.SUCCESS(
+            f"Run #{run.pk} {state}: {run.orders} orders and {run.items} items archived "
+            f"({time.perf_counter() - started:.2f}s this time)"
+        ))
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from products.renderers import FastJSONRenderer, StreamingJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = "Compare FastJSONRenderer with DRF's JSONRenderer on generated order rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000],
+            help="Row counts to benchmark (default: 100 1000 10000 50000).",
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="Runs per measurement; the fastest one is reported (default: 5).",
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                "orjson is not installed; FastJSONRenderer falls back to JSONRenderer."
+            ))
+        self.repeat = options['repeat']
+        self.stdout.write(
+            f"{'rows':>8}{'stock ms':>12}{'fast ms':>11}{'stream ms':>12}{'speedup':>10}"
+        )
+        for size in options['sizes']:
+            rows = self.generate(size)
+            stock, expected = self.measure(lambda: JSONRenderer().render(rows))
+            fast, actual = self.measure(lambda: FastJSONRenderer().render(rows))
+            streamed, chunks = self.measure(
+                lambda: b''.join(StreamingJSONRenderer().stream([rows[:size // 2], rows[size // 2:]]))
+            )
+            if actual != expected or chunks != expected:
+                raise CommandError("Renderer output differs from JSONRenderer")
+            self.stdout.write(
+                f"{size:>8}{stock:>12.1f}{fast:>11.1f}{streamed:>12.1f}{stock / fast:>9.1f}x"
+            )
+
+    def generate(self, size):
+        """
+        Build order-like rows with raw Decimal and datetime values.
+        """
+        created = datetime(2025, 1, 1, 8, 30, 15, 123456, tzinfo=timezone.utc)
+        return [
+            {
+                'id': i,
+                'customer': i % 97,
+                'status': 'P',
+                'shipping_address': f'{i} Moi Avenue, Nairobi',
+                'total': Decimal('1299.50'),
+                'created_at': created,
+                'items': [
+                    {'id': i * 2 + n, 'product': n, 'quantity': 1, 'price': Decimal('649.75')}
+                    for n in range(2)
+                ],
+            }
+            for i in range(size)
+        ]
+
+    def measure(self, render):
+        best = None
+        output = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            output = render()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, output
@@ -0,0 +1,90 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from myuser.models import Customer
+from products.models import Category, Order, OrderItem, Product
+from products.rows import OrderRows, ProductRows
+from products.serializers import OrderSerializer, ProductSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ProductSerializer/OrderSerializer with the values-based fast "
+        "path on generated rows. All generated data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+            help="Row counts to benchmark (default: 100 1000 10000).",
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help="Runs per measurement; the fastest one is reported (default: 3).",
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        self.stdout.write(
+            f"{'endpoint':<10}{'rows':>8}{'serializer ms':>16}{'fast path ms':>15}{'speedup':>10}"
+        )
+        for size in options['sizes']:
+            with transaction.atomic():
+                products, orders = self.generate(size)
+                self.compare('products', size, products, ProductSerializer, ProductRows)
+                self.compare('orders', size, orders, OrderSerializer, OrderRows)
+                transaction.set_rollback(True)
+
+    def generate(self, size):
+        """
+        Create ``size`` products and ``size`` two-item orders.
+        """
+        category = Category.objects.create(name='Benchmark')
+        products = Product.objects.bulk_create(
+            Product(name=f'Benchmark {i}', description='x' * 200, price='19.99', stock=10)
+            for i in range(size)
+        )
+        Product.categories.through.objects.bulk_create(
+            Product.categories.through(product_id=product.pk, category_id=category.pk)
+            for product in products
+        )
+        user = User.objects.create_user(username='benchmark-user', password=None)
+        customer = Customer.objects.create(user=user)
+        orders = Order.objects.bulk_create(
+            Order(customer=customer, shipping_address='Nairobi', total='39.98')
+            for _ in range(size)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=products[(i + offset) % size], quantity=1, price='19.99')
+            for i, order in enumerate(orders) for offset in (0, 1)
+        )
+        product_ids = [product.pk for product in products]
+        order_ids = [order.pk for order in orders]
+        return (
+            Product.objects.for_listing().filter(pk__in=product_ids).order_by('-id'),
+            Order.objects.for_listing().filter(pk__in=order_ids).order_by('-id'),
+        )
+
+    def measure(self, build):
+        best = None
+        output = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            output = JSONRenderer().render(build())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, output
+
+    def compare(self, label, size, queryset, serializer_class, rows_class):
+        slow, expected = self.measure(lambda: serializer_class(queryset.all(), many=True).data)
+        rows = rows_class()
+        fast, actual = self.measure(lambda: rows.render(rows.values(queryset.all())))
+        if actual != expected:
+            raise CommandError(f"Fast path output differs from {serializer_class.__name__}")
+        self.stdout.write(
+            f"{label:<10}{size:>8}{slow:>16.1f}{fast:>15.1f}{slow / fast:>9.1f}x"
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from products.exports import EXPORTS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or NDJSON dump of products or orders to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS), help="What to export.")
+        parser.add_argument(
+            '--format', dest='output', choices=sorted(FORMATS), default='csv',
+            help="Output format (default: csv).",
+        )
+        parser.add_argument(
+            '--since',
+            help="Only export rows updated at or after this ISO 8601 datetime.",
+        )
+        parser.add_argument(
+            '--output', dest='path',
+            help="File to write to (default: stdout).",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help="Rows fetched per database round trip (default: PRODUCTS_STREAM_CHUNK_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since:
+            parsed = parse_datetime(since)
+            if parsed is None:
+                raise CommandError(f"Invalid --since datetime '{since}'.")
+            since = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+        lines = export_lines(
+            options['dataset'], options['output'],
+            since=since or None, chunk_size=options['chunk_size'],
+        )
+        if options['path']:
+            with open(options['path'], 'w', newline='', encoding='utf-8') as handle:
+                count = self.write(handle, lines)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {count} lines to {options['path']}"))
+        else:
+            self.write(self.stdout, lines)
+
+    def write(self, handle, lines):
+        count = 0
+        for line in lines:
+            handle.write(line)
+            count += 1
+        return count
@@ -0,0 +1,69 @@
+import posixpath
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from products.models import Product
+from products.storage import get_product_media_storage
+
+MEDIA_DIR = 'products'
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete product media files (originals and variants) that no product "
+        "references any more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="List the files that would be deleted without deleting them.",
+        )
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help="Keep files younger than this, which may belong to uploads "
+                 "that are not committed yet (default: 24).",
+        )
+
+    def handle(self, *args, **options):
+        storage = get_product_media_storage()
+        if not storage.exists(MEDIA_DIR):
+            self.stdout.write("No product media stored.")
+            return
+
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        referenced = self.referenced_names()
+        deleted = 0
+        kept = 0
+        for name in self.walk(storage, MEDIA_DIR):
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                kept += 1
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"Would delete {name}")
+            else:
+                storage.delete(name)
+            deleted += 1
+
+        action = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {deleted} files, kept {kept}"))
+
+    def referenced_names(self):
+        """
+        Return the names of every stored original and variant in use.
+        """
+        names = set()
+        rows = Product.objects.values_list('image', 'image_variants').iterator(chunk_size=5000)
+        for image, variants in rows:
+            if image:
+                names.add(image)
+            for size in (variants or {}).get('sizes', []):
+                names.update(value for key, value in size.items() if key not in ('name', 'width', 'height'))
+        return names
+
+    def walk(self, storage, directory):
+        directories, files = storage.listdir(directory)
+        for name in files:
+            yield posixpath.join(directory, name)
+        for subdirectory in directories:
+            yield from self.walk(storage, posixpath.join(directory, subdirectory))
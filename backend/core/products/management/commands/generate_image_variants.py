@@ -0,0 +1,82 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from products.images import render_variants, save_variants, store_variants
+from products.models import Product
+
+
+def _render(data):
+    # Runs in a worker process: CPU work only, no database access.
+    try:
+        return render_variants(data), None
+    except Exception as e:
+        return None, str(e)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized image variants for existing products. Images are "
+        "decoded and resized in a process pool; files and rows are written "
+        "by this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Worker processes (default: number of CPUs).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help="Images read into memory and sent to the pool at a time (default: 50).",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Regenerate variants that already match the current image.",
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(Q(image='') | Q(image__isnull=True)).only(
+            'id', 'image', 'image_variants'
+        ).order_by('pk')
+        force = options['force']
+        processed = 0
+        failed = 0
+        started = time.perf_counter()
+
+        pending = (
+            product for product in products.iterator(chunk_size=options['batch_size'])
+            if force or (product.image_variants or {}).get('source') != product.image.name
+        )
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = list(islice(pending, options['batch_size']))
+                if not batch:
+                    break
+                sources = []
+                for product in batch:
+                    try:
+                        with product.image.open('rb') as handle:
+                            sources.append(handle.read())
+                    except OSError as e:
+                        sources.append(None)
+                        self.stderr.write(f"Product #{product.pk}: cannot read {product.image.name}: {e}")
+                jobs = [(product, data) for product, data in zip(batch, sources) if data is not None]
+                failed += len(batch) - len(jobs)
+                results = pool.map(_render, [data for _, data in jobs])
+                for (product, _), (rendered, error) in zip(jobs, results):
+                    if error:
+                        failed += 1
+                        self.stderr.write(f"Product #{product.pk}: {error}")
+                        continue
+                    variants = store_variants(product.image.name, rendered, product.image.storage)
+                    if save_variants(product.pk, product.image.name, variants):
+                        processed += 1
+                self.stdout.write(f"Processed {processed} images")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated variants for {processed} products ({failed} failed) in {elapsed:.1f}s"
+        ))
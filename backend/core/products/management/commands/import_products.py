@@ -0,0 +1,188 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from products.cache import PRODUCTS, bump_version
+from products.models import Category, Product
+from products.search import update_search_vectors
+from products.tree import get_category_paths
+
+# Columns checked with the model field's own validation.
+VALIDATED_FIELDS = ('name', 'price', 'stock', 'available')
+
+BOOLEAN_VALUES = {
+    'true': True, 't': True, 'yes': True, 'y': True, '1': True,
+    'false': False, 'f': False, 'no': False, 'n': False, '0': False,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products from a CSV or JSONL file into the catalogue. Rows "
+        "have name, description, price, stock, available and categories, "
+        "where categories is a '|' separated list of paths such as "
+        "'Electronics/Phones' (a list in JSONL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file to import.")
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'),
+            help="Input format (default: taken from the file extension).",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Products inserted per transaction (default: 5000).",
+        )
+        parser.add_argument(
+            '--category-separator', default='/',
+            help="Separator between the names of a category path (default: '/').",
+        )
+        parser.add_argument(
+            '--create-categories', action='store_true',
+            help="Create missing categories instead of skipping their rows.",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or self.guess_format(path)
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        self.separator = options['category_separator']
+        self.create_categories = options['create_categories']
+        self.category_paths = get_category_paths(self.separator)
+        self.fields = {name: Product._meta.get_field(name) for name in VALIDATED_FIELDS}
+
+        imported = 0
+        skipped = 0
+        started = time.perf_counter()
+        with open(path, newline='', encoding='utf-8') as handle:
+            rows = enumerate(self.read(handle, input_format), start=1)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                products = []
+                category_ids = []
+                for number, row in batch:
+                    try:
+                        product, categories = self.build(row)
+                    except (ValidationError, ValueError, TypeError) as e:
+                        skipped += 1
+                        message = '; '.join(e.messages) if isinstance(e, ValidationError) else e
+                        self.stderr.write(f"Row {number}: {message}")
+                        continue
+                    products.append(product)
+                    category_ids.append(categories)
+                imported += self.save(products, category_ids)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"Imported {imported} products ({imported / elapsed:.0f} rows/s)"
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} products, skipped {skipped}, in {elapsed:.1f}s "
+            f"({imported / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
+
+    def guess_format(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.jsonl', '.ndjson'):
+            return 'jsonl'
+        raise CommandError(f"Cannot tell the format of '{path}'; pass --format.")
+
+    def read(self, handle, input_format):
+        """
+        Yield one dict per input row without loading the whole file.
+
+        A JSONL line that does not hold an object is yielded as the
+        ValueError describing it, so ``build`` reports it like any other
+        invalid row.
+        """
+        if input_format == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield ValueError(f"line {number}: invalid JSON")
+                continue
+            if not isinstance(row, dict):
+                yield ValueError(f"line {number}: expected an object, got {type(row).__name__}")
+                continue
+            yield row
+
+    def build(self, row):
+        """
+        Return an unsaved product and its category ids for one input row.
+        """
+        if isinstance(row, ValueError):
+            raise row
+        values = {}
+        for name, field in self.fields.items():
+            value = row.get(name)
+            if value in (None, '') and field.has_default():
+                value = field.get_default()
+            elif name == 'available' and isinstance(value, str):
+                value = BOOLEAN_VALUES.get(value.strip().lower(), value)
+            values[name] = field.clean(value, None)
+        values['description'] = row.get('description') or ''
+
+        categories = row.get('categories') or []
+        if isinstance(categories, str):
+            categories = categories.split('|')
+        category_ids = [self.resolve_category(path.strip()) for path in categories if path.strip()]
+        return Product(**values), list(dict.fromkeys(category_ids))
+
+    def resolve_category(self, path):
+        """
+        Return the id of the category at ``path``, creating it if allowed.
+        """
+        category_id = self.category_paths.get(path)
+        if category_id is not None:
+            return category_id
+        if not self.create_categories:
+            raise ValueError(f"Unknown category '{path}'")
+
+        parent_id = None
+        current = None
+        for name in path.split(self.separator):
+            current = f"{current}{self.separator}{name}" if current else name
+            category_id = self.category_paths.get(current)
+            if category_id is None:
+                category_id = Category.objects.create(name=name, parent_id=parent_id).pk
+                self.category_paths[current] = category_id
+            parent_id = category_id
+        return category_id
+
+    def save(self, products, category_ids):
+        """
+        Insert one batch of products and their category links atomically.
+        """
+        if not products:
+            return 0
+        through = Product.categories.through
+        with transaction.atomic():
+            created = Product.objects.bulk_create(products, batch_size=len(products))
+            links = [
+                through(product_id=product.pk, category_id=category_id)
+                for product, ids in zip(created, category_ids)
+                for category_id in ids
+            ]
+            through.objects.bulk_create(links, batch_size=len(products))
+            # bulk_create sends no signals, so do their work once per batch.
+            update_search_vectors(Product.objects.filter(pk__in=[product.pk for product in created]))
+            bump_version(PRODUCTS)
+        return len(created)
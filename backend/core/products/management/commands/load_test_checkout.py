@@ -0,0 +1,143 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from products.checkout import CheckoutError, checkout
+from products.models import Cart, CartItem, Order, OrderItem, Product
+from products.rollups import record_deleted_orders, rollup_values
+from myuser.models import Customer
+
+User = get_user_model()
+
+PREFIX = 'loadtest-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent checkouts at a single product and check that it is "
+        "never oversold. Creates its own product, customers and carts and "
+        "removes them afterwards; do not run it against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--buyers', type=int, default=300,
+            help="Customers checking out at the same time (default: 300).",
+        )
+        parser.add_argument(
+            '--stock', type=int, default=100,
+            help="Units of the product in stock (default: 100).",
+        )
+        parser.add_argument(
+            '--quantity', type=int, default=1,
+            help="Units in each buyer's cart (default: 1).",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=32,
+            help="Threads sending checkouts (default: 32).",
+        )
+        parser.add_argument(
+            '--retries', type=int, default=20,
+            help="Attempts per checkout when the database reports lock contention (default: 20).",
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help="Leave the generated rows in place.",
+        )
+
+    def handle(self, *args, **options):
+        self.retries = options['retries']
+        product, carts = self.seed(options['buyers'], options['stock'], options['quantity'])
+        try:
+            start = threading.Event()
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                futures = [pool.submit(self.buy, cart, start) for cart in carts]
+                started = time.perf_counter()
+                start.set()
+                results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+            self.report(product, options, results, elapsed)
+        finally:
+            if not options['keep']:
+                self.cleanup(product)
+
+    def seed(self, buyers, stock, quantity):
+        """
+        Create one product and ``buyers`` customers with it in their carts.
+        """
+        product = Product.objects.create(
+            name=f'{PREFIX}product', description='', price='10.00', stock=stock
+        )
+        users = User.objects.bulk_create(
+            User(username=f'{PREFIX}{product.pk}-{i}', password='!') for i in range(buyers)
+        )
+        users = list(User.objects.filter(username__startswith=f'{PREFIX}{product.pk}-'))
+        customers = Customer.objects.bulk_create(Customer(user=user) for user in users)
+        carts = Cart.objects.bulk_create(Cart(customer=customer) for customer in customers)
+        carts = list(Cart.objects.filter(customer__user__in=users).select_related('customer'))
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=quantity) for cart in carts
+        )
+        return product, carts
+
+    def buy(self, cart, start):
+        """
+        Check out one cart; returns ``(outcome, seconds)``.
+        """
+        start.wait()
+        began = time.perf_counter()
+        try:
+            for attempt in range(self.retries):
+                try:
+                    checkout(cart, 'Load test', notify=False)
+                    return 'sold', time.perf_counter() - began
+                except CheckoutError:
+                    return 'rejected', time.perf_counter() - began
+                except OperationalError:
+                    # SQLite reports lock contention instead of waiting.
+                    time.sleep(0.005 * (attempt + 1))
+            return 'failed', time.perf_counter() - began
+        finally:
+            connection.close()
+
+    def report(self, product, options, results, elapsed):
+        outcomes = [outcome for outcome, _ in results]
+        latencies = sorted(seconds for outcome, seconds in results if outcome == 'sold')
+        product.refresh_from_db()
+        sold = sum(OrderItem.objects.filter(product=product).values_list('quantity', flat=True))
+        orders = Order.objects.filter(items__product=product).count()
+
+        self.stdout.write(
+            f"{options['buyers']} checkouts on {options['workers']} threads "
+            f"for {options['stock']} units in {elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"sold={outcomes.count('sold')} rejected={outcomes.count('rejected')} "
+            f"failed={outcomes.count('failed')} units_sold={sold} stock_left={product.stock} "
+            f"available={product.available}"
+        )
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+            self.stdout.write(
+                f"throughput={len(results) / elapsed:.1f} checkouts/s "
+                f"p50={statistics.median(latencies) * 1000:.1f}ms p95={p95 * 1000:.1f}ms"
+            )
+
+        if sold > options['stock']:
+            raise CommandError(f"Oversold: {sold} units sold from a stock of {options['stock']}")
+        if sold + product.stock != options['stock'] or orders != outcomes.count('sold'):
+            raise CommandError("Stock, orders and outcomes do not add up")
+        self.stdout.write(self.style.SUCCESS("No overselling"))
+
+    def cleanup(self, product):
+        with transaction.atomic():
+            orders = Order.objects.filter(
+                pk__in=OrderItem.objects.filter(product=product).values('order')
+            )
+            record_deleted_orders(rollup_values(orders))
+            orders.delete()
+            User.objects.filter(username__startswith=f'{PREFIX}{product.pk}-').delete()
+            product.delete()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from products.idempotency import expired_before
+from products.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than PRODUCTS_IDEMPOTENCY_TTL."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=expired_before()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import supports_full_text, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Backfill the full-text search vectors of all products in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Number of products updated per statement (default: 5000).",
+        )
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help="Only update products that have no search vector yet.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if not supports_full_text(queryset.db):
+            self.stdout.write(self.style.WARNING(
+                "Full-text search needs PostgreSQL; nothing to backfill."
+            ))
+            return
+        if options['missing_only']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        batch_size = options['batch_size']
+        updated = 0
+        last_id = 0
+        while True:
+            # Walk the primary key so every batch is an index range scan.
+            ids = list(
+                queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += update_search_vectors(queryset.filter(pk__gte=ids[0], pk__lte=ids[-1]))
+            last_id = ids[-1]
+            self.stdout.write(f"Updated {updated} products")
+
+        self.stdout.write(self.style.SUCCESS(f"Search vectors updated for {updated} products"))
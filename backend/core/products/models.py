@@ -1,6 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from mptt.models import MPTTModel, TreeForeignKey
 from myuser.models import Customer
+from .storage import get_product_media_storage
 
 class Category(MPTTModel):
     name = models.CharField(max_length=100)
@@ -14,6 +19,15 @@ class Category(MPTTModel):
         return self.name
     
 
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Prefetch what ProductSerializer reads, fetching only category ids.
+        """
+        return self.prefetch_related(
+            models.Prefetch('categories', queryset=Category.objects.only('id'))
+        )
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField()
@@ -23,10 +37,45 @@ class Product(models.Model):
     available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Stored under content-hashed names, see products.storage.
+    image = models.ImageField(
+        upload_to='products/', storage=get_product_media_storage, blank=True, null=True
+    )
+    # Resized WebP/JPEG copies of ``image``, see products.images.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Weighted tsvector of name and description, maintained by
+    # products.search on PostgreSQL only.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            # Available products, newest first (the keyset listing order).
+            # Partial, as listings never read unavailable products.
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(available=True),
+                name='product_available_created_idx',
+            ),
+        ]
+        constraints = [
+            # Checkout decrements stock conditionally; this is the backstop.
+            models.CheckConstraint(condition=models.Q(stock__gte=0), name='product_stock_non_negative'),
+        ]
     
     def __str__(self):
         return self.name
+
+class OrderQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Prefetch the items, products and category ids OrderSerializer reads,
+        and join the customer and user that order views log.
+        """
+        return self.select_related('customer__user').prefetch_related(
+            models.Prefetch('items', queryset=OrderItem.objects.for_listing())
+        )
     
 class Order(models.Model):
     ORDER_STATUS = (
@@ -36,6 +85,14 @@ class Order(models.Model):
         ('D', 'Delivered'),
         ('X', 'Cancelled'),
     )
+    # Statuses an order can move to from each status
+    STATUS_TRANSITIONS = {
+        'P': ('C', 'X'),
+        'C': ('S', 'X'),
+        'S': ('D',),
+        'D': (),
+        'X': (),
+    }
     
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -43,15 +100,37 @@ class Order(models.Model):
     status = models.CharField(max_length=1, choices=ORDER_STATUS, default='P')
     shipping_address = models.TextField()
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # A customer's orders, newest first.
+            models.Index(fields=['customer', '-created_at', '-id'], name='order_customer_created_idx'),
+            # All orders, newest first (staff listing).
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            models.Index(fields=['status'], name='order_status_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.customer}"
 
+class ItemQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Join the product and prefetch its category ids for nested serializers.
+        """
+        return self.select_related('product').prefetch_related(
+            models.Prefetch('product__categories', queryset=Category.objects.only('id'))
+        )
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    objects = ItemQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.quantity} x {self.product.name} (Order #{self.order.id})"
@@ -72,6 +151,8 @@ class CartItem(models.Model):
     cart = models.ForeignKey(Cart, related_name='items', on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+
+    objects = ItemQuerySet.as_manager()
     
     class Meta:
         unique_together = ('cart', 'product')  # Prevent duplicate items
@@ -81,4 +162,115 @@ class CartItem(models.Model):
     
     @property
     def subtotal(self):
-        return self.product.price * self.quantity
\ No newline at end of file
+        return self.product.price * self.quantity
+
+
+class ArchivedOrder(models.Model):
+    """
+    A delivered or cancelled order moved out of the live tables, see
+    products.archive. Keeps the order's id and columns.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    status = models.CharField(max_length=1, choices=Order.ORDER_STATUS)
+    shipping_address = models.TextField()
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', '-created_at', '-id'], name='archived_customer_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='archived_order_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id} - {self.customer}"
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, related_name='items', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product.name} (Archived order #{self.order_id})"
+
+class OrderArchiveRun(models.Model):
+    """
+    Progress of one ``archive_orders`` run. Each batch updates it in the
+    same transaction as the rows it moves, so an interrupted run resumes
+    right after the last batch that committed.
+    """
+    cutoff = models.DateTimeField()
+    last_order_id = models.BigIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    items = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Archive run #{self.id}: {self.orders} orders"
+
+
+class DailySales(models.Model):
+    """
+    Orders and revenue per creation day and status, see products.rollups.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=1, choices=Order.ORDER_STATUS)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'status')
+
+    def __str__(self):
+        return f"{self.day} {self.get_status_display()}: {self.orders} orders"
+
+class ProductSales(models.Model):
+    """
+    Units sold and revenue per product over all orders that are not
+    cancelled, see products.rollups.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='sales')
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            # Top products.
+            models.Index(fields=['-revenue'], name='product_sales_revenue_idx'),
+            models.Index(fields=['-units'], name='product_sales_units_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name}: {self.units} units"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The stored outcome of a POST sent with an ``Idempotency-Key`` header,
+    see products.idempotency. A row without ``completed_at`` belongs to a
+    request that is still in flight.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # Digest of the method, path and body of the first request
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+        indexes = [
+            # Purging expired keys.
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
@@ -4,6 +4,7 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 import logging
+from .models import Order
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +54,14 @@ def send_order_notifications(order):
     except Exception as e:
         logger.error(f"Failed to send notifications for order {order.id}: {str(e)}", exc_info=True)
 
+def notify_orders(order_ids):
+    """
+    Send the order notifications of several orders, e.g. from a background job.
+    """
+    orders = Order.objects.filter(pk__in=order_ids).select_related('customer__user').order_by('pk')
+    for order in orders:
+        send_order_notifications(order)
+
 def send_order_email_to_admin(order):
     try:
         subject = f"New Order Received - #{order.id}"
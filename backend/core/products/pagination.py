@@ -0,0 +1,174 @@
+"""
+Keyset (cursor) pagination for product, order and category listings.
+
+Each page is fetched with a ``WHERE (created_at, id) < (cursor values)``
+style filter on an indexed ordering instead of an OFFSET, so a deep page
+costs the same as the first one. Cursors are opaque base64 strings that
+encode the ordering values of the last row on the previous page.
+
+Pagination is opt-in: it only kicks in when the client sends ``cursor``
+or ``page_size``, so existing clients that expect a plain list keep
+working.
+"""
+
+import base64
+import heapq
+import json
+from itertools import islice
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate a queryset on a unique ordering such as ``(-created_at, -id)``.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_default_page_size(self):
+        return getattr(settings, 'PRODUCTS_PAGE_SIZE', 20)
+
+    def get_max_page_size(self):
+        return getattr(settings, 'PRODUCTS_MAX_PAGE_SIZE', 100)
+
+    def is_requested(self, request):
+        """
+        Return True if the client asked for a paginated response.
+        """
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.get_default_page_size()
+        if page_size < 1:
+            return self.get_default_page_size()
+        return min(page_size, self.get_max_page_size())
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request, view)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Paginate querysets of different tables as one merged listing.
+
+        Each queryset must produce the ordering fields. Every one is cut to
+        a page on its own, then the pages are merged, so a page still costs
+        one indexed query per table.
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        pages = []
+        for queryset in querysets:
+            queryset = queryset.order_by(*self.ordering)
+            position = self.decode_cursor(request, queryset.model)
+            if position is not None:
+                queryset = queryset.filter(self.get_keyset_filter(position))
+            # One extra row tells us whether there is a next page.
+            pages.append(list(queryset[:page_size + 1]))
+
+        rows = list(islice(self.merge(pages), page_size + 1))
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def merge(self, iterables):
+        """
+        Merge row iterables that are each sorted by the ordering.
+
+        All ordering fields must sort in the same direction.
+        """
+        if len(iterables) == 1:
+            return iter(iterables[0])
+        descending = self.get_fields()[0][1]
+        return heapq.merge(*iterables, key=self.get_position, reverse=descending)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = self.encode_cursor(self.get_position(self.page[-1]))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_fields(self):
+        """
+        Return ``(field_name, descending)`` pairs for the ordering.
+        """
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def get_position(self, row):
+        """
+        Return the ordering values of a row (model instance or dict).
+        """
+        if isinstance(row, dict):
+            return [row[name] for name, _ in self.get_fields()]
+        return [getattr(row, name) for name, _ in self.get_fields()]
+
+    def get_keyset_filter(self, position):
+        """
+        Build the row comparison ``(a, b) < (x, y)`` as an OR of ANDs.
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.get_fields(), position):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        encoded = base64.urlsafe_b64encode(json.dumps(values).encode('utf-8'))
+        return encoded.decode('ascii')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            fields = self.get_fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class CategoryKeysetPagination(KeysetPagination):
+    """
+    Categories have no timestamps, so page through them in MPTT tree order.
+    """
+    ordering = ('tree_id', 'lft')
@@ -0,0 +1,243 @@
+"""
+Incrementally maintained sales rollups.
+
+``DailySales`` holds the number of orders and their revenue per creation
+day and status; ``ProductSales`` the units sold and revenue per product
+over every order that is not cancelled. Dashboards read these small
+tables instead of scanning ``Order`` and ``OrderItem``, so their cost
+depends on the number of days and products, not on the order history.
+
+Design:
+- Every code path that creates an order, changes its status or deletes
+  it calls one of the ``record_*`` functions in the same transaction,
+  so the rollups commit or roll back with the orders.
+- A change is applied as deltas: missing rollup rows are inserted
+  empty, then every row is incremented with a single ``UPDATE ... SET
+  x = CASE ...`` of ``F()`` expressions. Concurrent writers never
+  overwrite each other's counts, and the number of queries does not
+  depend on the number of orders or products involved.
+- Days are taken in the current time zone, like ``TruncDate``.
+- ``rebuild_sales_rollups`` recomputes both tables from the live and
+  archived orders, e.g. to backfill them or after orders were edited
+  outside these paths (such as in the admin).
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import (
+    ArchivedOrder, ArchivedOrderItem, DailySales, Order, OrderItem, ProductSales,
+)
+
+CANCELLED = 'X'
+
+CENTS = Decimal('0.01')
+
+
+def _apply(model, keys, deltas):
+    """
+    Add ``{key: {field: delta}}`` to the rows of ``model`` identified by
+    ``keys`` fields, creating missing rows first.
+    """
+    deltas = {key: values for key, values in deltas.items() if any(values.values())}
+    if not deltas:
+        return
+    model.objects.bulk_create(
+        [model(**dict(zip(keys, key))) for key in deltas], ignore_conflicts=True
+    )
+    lookups = {key: Q(**dict(zip(keys, key))) for key in deltas}
+    fields = {field for values in deltas.values() for field in values}
+    match = Q()
+    for lookup in lookups.values():
+        match |= lookup
+    update = {}
+    for field in fields:
+        output = model._meta.get_field(field)
+        update[field] = Case(
+            *[
+                When(lookups[key], then=F(field) + Value(values[field], output_field=output))
+                for key, values in deltas.items() if values.get(field)
+            ],
+            default=F(field),
+        )
+    model.objects.filter(match).update(**update)
+
+
+def _daily_key(created_at, status):
+    return (timezone.localdate(created_at), status)
+
+
+def _add_daily(deltas, order, sign):
+    values = deltas[_daily_key(order['created_at'], order['status'])]
+    values['orders'] += sign
+    values['revenue'] += sign * order['total']
+
+
+def _add_products(deltas, order_ids, sign):
+    """
+    Add the items of ``order_ids`` to product deltas, with one query.
+    """
+    if not order_ids:
+        return
+    lines = OrderItem.objects.filter(order__in=order_ids).values('product').annotate(
+        units=Sum('quantity'), revenue=Sum('price')
+    ).order_by()
+    for line in lines:
+        values = deltas[(line['product'],)]
+        values['units'] += sign * line['units']
+        values['revenue'] += sign * line['revenue']
+
+
+def _deltas():
+    return defaultdict(lambda: defaultdict(lambda: 0))
+
+
+def record_order(order, items):
+    """
+    Count a newly created order and its ``OrderItem`` objects.
+    """
+    daily = _deltas()
+    _add_daily(daily, {'created_at': order.created_at, 'status': order.status, 'total': order.total}, 1)
+    products = _deltas()
+    if order.status != CANCELLED:
+        for item in items:
+            values = products[(item.product_id,)]
+            values['units'] += item.quantity
+            values['revenue'] += item.price
+    _apply(DailySales, ('day', 'status'), daily)
+    _apply(ProductSales, ('product_id',), products)
+
+
+def record_status_change(orders, new_status):
+    """
+    Move orders to ``new_status`` in the rollups.
+
+    ``orders`` are dicts with the ``id``, ``created_at``, ``total`` and
+    previous ``status`` of each order, read before the change.
+    """
+    daily = _deltas()
+    products = _deltas()
+    cancelled, restored = [], []
+    for order in orders:
+        if order['status'] == new_status:
+            continue
+        _add_daily(daily, order, -1)
+        _add_daily(daily, {**order, 'status': new_status}, 1)
+        if new_status == CANCELLED:
+            cancelled.append(order['id'])
+        elif order['status'] == CANCELLED:
+            restored.append(order['id'])
+    _add_products(products, cancelled, -1)
+    _add_products(products, restored, 1)
+    _apply(DailySales, ('day', 'status'), daily)
+    _apply(ProductSales, ('product_id',), products)
+
+
+def record_deleted_orders(orders):
+    """
+    Remove orders from the rollups; call this before deleting them.
+
+    ``orders`` are dicts with the ``id``, ``created_at``, ``total`` and
+    ``status`` of each order.
+    """
+    daily = _deltas()
+    products = _deltas()
+    for order in orders:
+        _add_daily(daily, order, -1)
+    _add_products(products, [o['id'] for o in orders if o['status'] != CANCELLED], -1)
+    _apply(DailySales, ('day', 'status'), daily)
+    _apply(ProductSales, ('product_id',), products)
+
+
+def rollup_values(orders):
+    """
+    Return the rollup input dicts of an Order queryset.
+    """
+    return list(orders.values('id', 'created_at', 'total', 'status'))
+
+
+def _money(value):
+    return str((value or Decimal('0')).quantize(CENTS))
+
+
+def sales_summary(start=None, end=None, top=10, rank='revenue'):
+    """
+    Return dashboard figures read from the rollups alone.
+
+    ``start`` and ``end`` are inclusive days limiting the daily figures;
+    top products always cover all orders. Cancelled orders are left out
+    of revenue.
+    """
+    days = DailySales.objects.all()
+    if start:
+        days = days.filter(day__gte=start)
+    if end:
+        days = days.filter(day__lte=end)
+    by_day = days.exclude(status=CANCELLED).values('day').annotate(
+        orders=Sum('orders'), revenue=Sum('revenue')
+    ).order_by('day')
+    by_status = dict(days.values_list('status').annotate(orders=Sum('orders')).order_by())
+    products = ProductSales.objects.filter(units__gt=0).order_by(f'-{rank}', 'product_id').values(
+        'product_id', 'product__name', 'units', 'revenue'
+    )[:top]
+
+    revenue_by_day = [
+        {'day': row['day'], 'orders': row['orders'], 'revenue': _money(row['revenue'])}
+        for row in by_day
+    ]
+    return {
+        'revenue_by_day': revenue_by_day,
+        'orders_by_status': {code: by_status.get(code, 0) for code, _ in Order.ORDER_STATUS},
+        'totals': {
+            'orders': sum(row['orders'] for row in revenue_by_day),
+            'revenue': _money(sum((row['revenue'] for row in by_day), Decimal('0'))),
+        },
+        'top_products': [
+            {
+                'product': row['product_id'], 'name': row['product__name'],
+                'units': row['units'], 'revenue': _money(row['revenue']),
+            }
+            for row in products
+        ],
+    }
+
+
+def rebuild():
+    """
+    Recompute both rollup tables from the live and archived order tables.
+
+    Returns ``(daily rows, product rows)``.
+    """
+    daily = defaultdict(lambda: [0, Decimal('0')])
+    products = defaultdict(lambda: [0, Decimal('0')])
+    for orders, items in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+        rows = orders.objects.annotate(day=TruncDate('created_at')).values('day', 'status').annotate(
+            orders=Count('id'), revenue=Sum('total')
+        ).order_by()
+        for row in rows:
+            totals = daily[(row['day'], row['status'])]
+            totals[0] += row['orders']
+            totals[1] += row['revenue'] or 0
+        rows = items.objects.exclude(order__status=CANCELLED).values('product').annotate(
+            units=Sum('quantity'), revenue=Sum('price')
+        ).order_by()
+        for row in rows:
+            totals = products[row['product']]
+            totals[0] += row['units']
+            totals[1] += row['revenue']
+
+    with transaction.atomic():
+        DailySales.objects.all().delete()
+        ProductSales.objects.all().delete()
+        DailySales.objects.bulk_create(
+            DailySales(day=day, status=code, orders=orders, revenue=revenue)
+            for (day, code), (orders, revenue) in daily.items()
+        )
+        ProductSales.objects.bulk_create(
+            ProductSales(product_id=product, units=units, revenue=revenue)
+            for product, (units, revenue) in products.items()
+        )
+    return len(daily), len(products)
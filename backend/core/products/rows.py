@@ -0,0 +1,232 @@
+"""
+Read-only fast path for large product and order listings.
+
+``ProductSerializer`` and ``OrderSerializer`` build every row through
+model instances, ``get_attribute`` and one serializer call per field.
+For lists of hundreds of rows that machinery dominates the request. The
+renderers here read plain ``.values()`` rows instead, attach related ids
+and nested items from one grouped query per relation, and convert values
+with the very same DRF fields the serializers use, so the output is
+identical to the serializer's.
+
+Design:
+- Field order, sparse ``fields`` handling and value formatting all come
+  from a serializer instance, so a field added to the serializer shows up
+  here without further changes.
+- The relation queries mirror the prefetches in ``for_listing()``, so
+  both paths return related rows in the same order.
+"""
+
+from django.db.models import BooleanField, Value
+from rest_framework import serializers
+from .models import ArchivedOrderItem, Category, OrderItem, Product
+from .serializers import OrderItemSerializer, OrderSerializer, ProductSerializer
+
+# Fields whose ``to_representation`` returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+)
+
+
+def _converters(fields, skip=()):
+    """
+    Map field names to ``(source, convert)`` pairs, where ``convert`` is a
+    ``to_representation`` callable, or None when the stored value can be
+    used as it is.
+    """
+    converters = {}
+    for name, field in fields.items():
+        if name in skip:
+            continue
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            convert = None
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            convert = None
+        else:
+            convert = field.to_representation
+        converters[name] = (field.source, convert)
+    return converters
+
+
+def _sources(converters):
+    return {source for source, _ in converters.values()}
+
+
+def _convert(row, converters):
+    data = {}
+    for name, (source, convert) in converters.items():
+        value = row[source]
+        data[name] = value if value is None or convert is None else convert(value)
+    return data
+
+
+class ProductRows:
+    """
+    Render products exactly like ``ProductSerializer(many=True)``.
+    """
+    relations = ('categories', 'image')
+
+    def __init__(self, fields=None, context=None):
+        self.context = context or {}
+        serializer = ProductSerializer(fields=fields, context=self.context)
+        self.fields = list(serializer.fields)
+        self.converters = _converters(serializer.fields, skip=self.relations)
+        self.image_storage = Product._meta.get_field('image').storage
+
+    def values(self, queryset):
+        """
+        Return ``queryset`` as a values queryset holding the rendered columns.
+
+        ``id`` and ``created_at`` are always included for keyset cursors.
+        """
+        columns = {'id', 'created_at'} | _sources(self.converters)
+        if 'image' in self.fields:
+            columns.add('image')
+        return queryset.prefetch_related(None).values(*columns)
+
+    def get_categories(self, ids):
+        """
+        Return ``{product_id: [category_id, ...]}`` for the given products.
+        """
+        categories = {}
+        pairs = Category.objects.filter(product__in=ids).values_list('product', 'id')
+        for product_id, category_id in pairs:
+            categories.setdefault(product_id, []).append(category_id)
+        return categories
+
+    def get_image(self, name):
+        if not name:
+            return None
+        url = self.image_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def render(self, rows):
+        """
+        Return the serialized form of the given values rows.
+        """
+        rows = list(rows)
+        categories = {}
+        if 'categories' in self.fields:
+            categories = self.get_categories([row['id'] for row in rows])
+
+        data = []
+        for row in rows:
+            item = _convert(row, self.converters)
+            if 'image' in self.fields:
+                item['image'] = self.get_image(row['image'])
+            if 'categories' in self.fields:
+                item['categories'] = categories.get(row['id'], [])
+            data.append({name: item[name] for name in self.fields})
+        return data
+
+
+class OrderRows:
+    """
+    Render orders exactly like ``OrderSerializer(many=True)``.
+
+    With ``summary`` each item's ``product`` is just the product id, so no
+    product rows are read at all.
+    """
+    item_model = OrderItem
+
+    def __init__(self, fields=None, context=None, summary=False):
+        self.context = context or {}
+        self.summary = summary
+        serializer = OrderSerializer(fields=fields, context=self.context)
+        self.fields = list(serializer.fields)
+        self.converters = _converters(serializer.fields, skip=('items',))
+        item_serializer = OrderItemSerializer()
+        self.item_fields = list(item_serializer.fields)
+        self.item_converters = _converters(item_serializer.fields, skip=('product',))
+
+    def values(self, queryset):
+        """
+        Return ``queryset`` as a values queryset holding the rendered columns.
+        """
+        columns = {'id', 'created_at'} | _sources(self.converters)
+        return queryset.prefetch_related(None).values(*columns)
+
+    def get_items(self, ids):
+        """
+        Return ``{order_id: [item, ...]}`` with each item's product nested
+        (or its id in summary mode).
+        """
+        rows = list(
+            self.item_model.objects.filter(order__in=ids)
+            .values('order', 'product', *_sources(self.item_converters))
+        )
+        product_data = None
+        if not self.summary:
+            products = ProductRows(context=self.context)
+            product_rows = products.values(
+                Product.objects.filter(pk__in={row['product'] for row in rows})
+            )
+            product_data = {product['id']: product for product in products.render(product_rows)}
+
+        items = {}
+        for row in rows:
+            item = _convert(row, self.item_converters)
+            item['product'] = row['product'] if self.summary else product_data[row['product']]
+            items.setdefault(row['order'], []).append(
+                {name: item[name] for name in self.item_fields}
+            )
+        return items
+
+    def render(self, rows):
+        """
+        Return the serialized form of the given values rows.
+        """
+        rows = list(rows)
+        items = {}
+        if 'items' in self.fields:
+            items = self.get_items([row['id'] for row in rows])
+
+        data = []
+        for row in rows:
+            order = _convert(row, self.converters)
+            if 'items' in self.fields:
+                order['items'] = items.get(row['id'], [])
+            data.append({name: order[name] for name in self.fields})
+        return data
+
+
+class ArchivedOrderRows(OrderRows):
+    """
+    Render archived orders exactly like live ones.
+    """
+    item_model = ArchivedOrderItem
+
+
+class MergedOrderRows:
+    """
+    Render a listing that merges live and archived order rows.
+
+    Rows must come from ``values()``, which tags each row with the table
+    it was read from, so ``render`` can look up its items in the right one.
+    """
+    def __init__(self, live, archived):
+        self.renderers = {False: live, True: archived}
+
+    def values(self, live, archived):
+        """
+        Return the tagged values querysets of live and archived orders.
+        """
+        return [
+            self.renderers[False].values(live).annotate(archived=Value(False, BooleanField())),
+            self.renderers[True].values(archived).annotate(archived=Value(True, BooleanField())),
+        ]
+
+    def render(self, rows):
+        """
+        Return the serialized form of merged rows, in their given order.
+        """
+        rows = list(rows)
+        rendered = {
+            archived: iter(renderer.render([row for row in rows if row['archived'] == archived]))
+            for archived, renderer in self.renderers.items()
+        }
+        return [next(rendered[bool(row['archived'])]) for row in rows]
@@ -0,0 +1,72 @@
+"""
+Product full-text search.
+
+On PostgreSQL every product carries a weighted ``search_vector`` (name
+ranked above description) backed by a GIN index, and matches are ordered
+by ``ts_rank``. Other databases, such as a local SQLite database, fall
+back to case-insensitive LIKE matching on every search term, ranked by
+how many of the terms appear in the product name.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+SEARCH_CONFIG = getattr(settings, 'PRODUCTS_SEARCH_CONFIG', 'english')
+
+
+def supports_full_text(using):
+    """
+    Return True if the database behind ``using`` is PostgreSQL.
+    """
+    return connections[using].vendor == 'postgresql'
+
+
+def product_search_vector():
+    """
+    Expression that builds a product's weighted search vector.
+    """
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    """
+    Recompute the search vectors of the given products in one UPDATE.
+
+    Returns the number of products updated, which is always 0 on
+    databases without full-text search.
+    """
+    if not supports_full_text(queryset.db):
+        return 0
+    return queryset.update(search_vector=product_search_vector())
+
+
+def search_products(queryset, query):
+    """
+    Filter ``queryset`` down to products matching ``query``, best first.
+
+    Every result is annotated with a ``rank``.
+    """
+    if supports_full_text(queryset.db):
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-id')
+
+    terms = query.split()
+    if not terms:
+        return queryset.none()
+    condition = Q()
+    rank = Value(0)
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(description__icontains=term)
+        rank += Case(
+            When(name__icontains=term, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    return queryset.filter(condition).annotate(rank=rank).order_by('-rank', '-id')
@@ -1,6 +1,25 @@
+from decimal import Decimal
+from django.conf import settings
+from django.db import models, transaction
 from rest_framework import serializers
 from .models import *
 from myuser.models import Customer
+from .checkout import CheckoutError, reserve_stock
+from .rollups import record_order
+from .images import build_srcset
+from .tree import get_category_tree
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin that accepts a ``fields`` keyword argument and drops
+    every declared field that is not listed in it.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 class CategorySerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
@@ -10,9 +29,13 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'parent', 'children')
     
     def get_children(self, obj):
-        children = obj.get_children()
-        serializer = CategorySerializer(children, many=True)
-        return serializer.data
+        # Read the subtree from the cached in-memory tree instead of
+        # issuing one query per node.
+        node = get_category_tree().get(obj.id)
+        if node is None:
+            serializer = CategorySerializer(obj.get_children(), many=True)
+            return serializer.data
+        return node['children']
     
 class SimpleCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -34,18 +57,37 @@ class SimpleCategorySerializer(serializers.ModelSerializer):
 #             image_url =  product.image.url
 #             return request.build_absolute_uri(image_url) if request else image_url
 #         return None
-class ProductSerializer(serializers.ModelSerializer):
+class ImageSrcsetField(serializers.Field):
+    """
+    Read-only field that renders stored image variants as one ``srcset``
+    string per format, e.g. ``{'webp': '/media/a.webp 150w, ...'}``.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        storage = Product._meta.get_field('image').storage
+
+        def url(name):
+            image_url = storage.url(name)
+            return request.build_absolute_uri(image_url) if request else image_url
+        return build_srcset(variants, url)
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     categories = serializers.PrimaryKeyRelatedField(
         many=True,
         queryset=Category.objects.all(),
         required=False
     )
     image = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField(source='image_variants')
     
     class Meta:
         model = Product
         fields = ('id', 'name', 'description', 'price', 'categories', 
-                 'stock', 'available', 'image', 'created_at', 'updated_at')
+                 'stock', 'available', 'image', 'image_srcset', 'created_at', 'updated_at')
         
     def get_image(self, product):
         request = self.context.get('request')
@@ -67,14 +109,74 @@ class ProductSerializer(serializers.ModelSerializer):
             instance.categories.set(categories)
         return instance
     
+class ProductPatchSerializer(serializers.Serializer):
+    """
+    One row of a bulk price/stock update. Only the fields sent are changed.
+    """
+    PATCH_FIELDS = ('price', 'stock', 'available')
+
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    stock = serializers.IntegerField(min_value=0, required=False)
+    available = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if not any(name in attrs for name in self.PATCH_FIELDS):
+            raise serializers.ValidationError(
+                f"At least one of {', '.join(self.PATCH_FIELDS)} is required."
+            )
+        return attrs
+
+class ItemListSerializer(serializers.ListSerializer):
+    """
+    List serializer for order and cart items.
+
+    Items that were not prefetched by the caller are loaded with
+    ``for_listing()``, so the nested products and their category ids come
+    from two extra queries instead of two per item.
+    """
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        if isinstance(data, ItemQuerySet) and data._result_cache is None:
+            data = data.for_listing()
+        return super().to_representation(data)
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     
     class Meta:
         model = OrderItem
         fields = ('id', 'product', 'quantity', 'price')
+        list_serializer_class = ItemListSerializer
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderLineListSerializer(serializers.ListSerializer):
+    """
+    Load the products of all order lines with one query.
+    """
+    def validate(self, attrs):
+        ids = {line['product'] for line in attrs}
+        products = Product.objects.in_bulk(ids)
+        missing = sorted(ids - set(products))
+        if missing:
+            raise serializers.ValidationError(
+                f"Unknown product ids: {', '.join(str(pk) for pk in missing)}."
+            )
+        for line in attrs:
+            line['product'] = products[line['product']]
+        return attrs
+
+class OrderLineSerializer(serializers.Serializer):
+    """
+    One requested order line. After validation ``product`` is the Product.
+    """
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        list_serializer_class = OrderLineListSerializer
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     customer = serializers.PrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
@@ -88,27 +190,55 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ('total', 'created_at', 'updated_at')
     
     def create(self, validated_data):
+        """
+        Create the order and all of its items in one transaction.
+
+        ``context['items']`` holds validated ``OrderLineSerializer`` data,
+        with products already loaded. Their stock is taken like at
+        checkout, under the product locks; an order that cannot be filled
+        is rejected with a validation error. The total is computed up
+        front, so the order is written once and the items in a single
+        INSERT.
+        """
         items_data = self.context.get('items', [])
-        order = Order.objects.create(**validated_data)
-        total = 0
-        
-        for item_data in items_data:
-            product = item_data['product']
-            quantity = item_data['quantity']
-            price = product.price * quantity
-            total += price
-            
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                price=price
-            )
-        
-        order.total = total
-        order.save()
+        lines = {}
+        for item in items_data:
+            pk = item['product'].pk
+            lines[pk] = lines.get(pk, 0) + item['quantity']
+        with transaction.atomic():
+            try:
+                products = {p.pk: p for p in reserve_stock(lines)} if lines else {}
+            except CheckoutError as e:
+                raise serializers.ValidationError({'items': [str(e)]})
+            items = [
+                OrderItem(
+                    product=products[item['product'].pk],
+                    quantity=item['quantity'],
+                    price=products[item['product'].pk].price * item['quantity'],
+                )
+                for item in items_data
+            ]
+            validated_data['total'] = sum((item.price for item in items), Decimal('0'))
+            order = Order.objects.create(**validated_data)
+            for item in items:
+                item.order = order
+            OrderItem.objects.bulk_create(items)
+            record_order(order, items)
         return order
     
+class OrderStatusTransitionSerializer(serializers.Serializer):
+    """
+    A batch of orders to move to one status. Repeated ids are dropped.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    status = serializers.ChoiceField(choices=Order.ORDER_STATUS)
+
+    def validate_ids(self, value):
+        limit = settings.PRODUCTS_BULK_STATUS_LIMIT
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} orders can be updated at once.")
+        return list(dict.fromkeys(value))
+
 class CartItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     subtotal = serializers.SerializerMethodField()
@@ -117,6 +247,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         model = CartItem
         fields = ('id', 'product', 'quantity', 'subtotal')
         read_only_fields = ('subtotal',)
+        list_serializer_class = ItemListSerializer
     
     def get_subtotal(self, obj):
         return obj.subtotal
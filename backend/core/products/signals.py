@@ -0,0 +1,78 @@
+"""
+Signal handlers that keep cached catalogue data in step with the database.
+"""
+
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from mptt.signals import node_moved
+from .cache import CATEGORY_TREE, PRODUCTS, bump_version
+from .models import Category, Product
+from .search import update_search_vectors
+from .tasks import enqueue_image_processing
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category_tree(sender, **kwargs):
+    """
+    Drop the cached category tree whenever a category changes.
+    """
+    bump_version(CATEGORY_TREE)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(node_moved, sender=Category)
+def invalidate_category_products(sender, **kwargs):
+    """
+    Drop the cached tree and product data when a category is deleted or
+    moved.
+
+    Deleting a category cascades to its product assignments without
+    sending m2m_changed, and moving one changes which products a category
+    filter matches, so cached products are stale as well.
+    """
+    bump_version(CATEGORY_TREE, PRODUCTS)
+
+
+@receiver(post_save, sender=Product)
+def refresh_search_vector(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep a product's full-text search vector in step with its text fields.
+    """
+    if update_fields is not None and not {'name', 'description'} & set(update_fields):
+        return
+    update_search_vectors(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Product)
+def queue_image_variants(sender, instance, update_fields=None, **kwargs):
+    """
+    Regenerate a product's image variants when its image changes.
+    """
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    source = instance.image.name if instance.image else None
+    variants = instance.image_variants or {}
+    if source == variants.get('source'):
+        return
+    if source is None:
+        Product.objects.filter(pk=instance.pk).update(image_variants={})
+        return
+    enqueue_image_processing(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_products(sender, **kwargs):
+    """
+    Drop cached product data whenever a product changes.
+    """
+    bump_version(PRODUCTS)
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def invalidate_product_categories(sender, action, **kwargs):
+    """
+    Drop cached product data when products move between categories.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(PRODUCTS)
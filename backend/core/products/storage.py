@@ -0,0 +1,93 @@
+"""
+Content-addressed storage for product media.
+
+Files are named after the SHA-256 of their bytes, e.g.
+``products/3a7bd3e2...c9.jpg``, so:
+
+- uploading an image that is already stored writes nothing and hands
+  back the existing name, however many products share it;
+- a name always refers to the same bytes, so responses for it can be
+  cached forever (see ``IMMUTABLE_CACHE_CONTROL``).
+
+Files are never overwritten with different content, so nothing is ever
+removed on save; ``gc_product_media`` deletes files no product
+references any more. Saving bytes that are already stored touches the
+file, so the collector's minimum age protects it like a new upload.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{64}\.[0-9a-z]+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def content_digest(content):
+    """
+    Return the SHA-256 hex digest of a file, leaving it rewound.
+    """
+    sha256 = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+    return sha256.hexdigest()
+
+
+def is_content_addressed(name):
+    """
+    Return True if ``name`` is a content-hashed file name.
+    """
+    return bool(CONTENT_ADDRESSED_NAME.match(posixpath.basename(name)))
+
+
+@deconstructible(path='products.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files by the hash of their content.
+
+    The directory of the requested name (e.g. ``upload_to``) and its
+    lower-cased extension are kept; the rest of the name is replaced.
+    """
+    def __init__(self, **kwargs):
+        # Two uploads racing to the same name carry the same bytes.
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        extension = posixpath.splitext(name)[1].lower()
+        name = posixpath.join(posixpath.dirname(name), content_digest(content) + extension)
+        if self.exists(name):
+            # Restart the GC grace period for the new reference.
+            try:
+                os.utime(self.path(name))
+            except FileNotFoundError:
+                pass
+            else:
+                return name
+        return super().save(name, content, max_length=max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # A name is only ever reused for identical bytes.
+        return name
+
+
+product_media_storage = ContentAddressedStorage()
+
+
+def get_product_media_storage():
+    """
+    Return the storage used for product images and their variants.
+    """
+    return product_media_storage
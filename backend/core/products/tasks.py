@@ -0,0 +1,66 @@
+"""
+Background work for the products app.
+
+Jobs run on a small in-process thread pool, so slow work such as image
+resizing happens off the request thread without a separate task queue.
+Jobs are submitted once the surrounding transaction commits, so they
+always see the rows that triggered them. Setting
+``PRODUCTS_BACKGROUND_WORKERS`` to 0 runs jobs inline instead.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from .images import process_product_image
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the shared thread pool, creating it on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PRODUCTS_BACKGROUND_WORKERS,
+                thread_name_prefix='products-background',
+            )
+    return _executor
+
+
+def _run(func, *args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.error(f"Background job {func.__name__}{args} failed", exc_info=True)
+    finally:
+        # Worker threads hold their own database connections.
+        connections.close_all()
+
+
+def run_in_background(func, *args):
+    """
+    Run ``func(*args)`` on the background pool once the transaction commits.
+    """
+    def submit():
+        if settings.PRODUCTS_BACKGROUND_WORKERS:
+            get_executor().submit(_run, func, *args)
+        else:
+            func(*args)
+
+    transaction.on_commit(submit)
+
+
+def enqueue_image_processing(product_id):
+    """
+    Generate the resized variants of a product's image in the background.
+    """
+    run_in_background(process_product_image, product_id)
@@ -0,0 +1,57 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from myuser.models import Customer
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached catalogue data outlives the per-test database rollback.
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+@pytest.fixture
+def authenticated_client(django_user_model):
+    # Authenticated reads bypass the anonymous response cache. A client of
+    # its own keeps api_client anonymous in tests that use both.
+    user = django_user_model.objects.create_user(username='reader', password='pass12345')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+@pytest.fixture
+def staff_client(api_client, django_user_model):
+    user = django_user_model.objects.create_user(username='staff', password='pass12345', is_staff=True)
+    api_client.force_authenticate(user=user)
+    return api_client
+
+@pytest.fixture
+def customer(django_user_model):
+    user = django_user_model.objects.create_user(username='buyer', password='pass12345')
+    return Customer.objects.create(user=user, phone='')
+
+@pytest.fixture
+def customer_client(customer):
+    client = APIClient()
+    client.force_authenticate(user=customer.user)
+    return client
+
+@pytest.fixture
+def count_queries():
+    """
+    Return a function that GETs a URL, checks the response status and
+    returns the number of queries the request ran.
+    """
+    def count(client, url, params=None, status=200, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, params or {}, **extra)
+        assert response.status_code == status
+        return len(ctx.captured_queries)
+    return count
@@ -0,0 +1,162 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import (
+    ArchivedOrder, ArchivedOrderItem, DailySales, Order, OrderArchiveRun, OrderItem, Product,
+    ProductSales,
+)
+from products.rollups import rebuild
+from myuser.models import Customer
+
+User = get_user_model()
+
+
+@pytest.fixture
+def orders(customer):
+    """
+    Eight orders, newest last; the odd ones are finished and old.
+    """
+    product = Product.objects.create(name='Phone', description='', price='10.00', stock=100)
+    now = timezone.now()
+    created = []
+    for i in range(8):
+        order = Order.objects.create(
+            customer=customer, shipping_address='Nairobi', status='DPXC'[i % 4], total='20.00'
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=1, price='10.00'),
+            OrderItem(order=order, product=product, quantity=1, price='10.00'),
+        ])
+        age = timedelta(days=400 - i) if order.status in 'DX' else timedelta(days=1)
+        Order.objects.filter(pk=order.pk).update(
+            created_at=now - timedelta(days=500 - i), updated_at=now - age
+        )
+        created.append(order)
+    return created
+
+def archive(*args):
+    out = StringIO()
+    call_command('archive_orders', *args, stdout=out)
+    return out.getvalue()
+
+@pytest.mark.django_db
+class TestArchiveOrders:
+    def test_moves_old_finished_orders(self, orders):
+        archive('--days', '30')
+        finished = [o.pk for o in orders if o.status in 'DX']
+        assert sorted(ArchivedOrder.objects.values_list('pk', flat=True)) == finished
+        assert ArchivedOrderItem.objects.count() == 2 * len(finished)
+        assert not Order.objects.filter(pk__in=finished).exists()
+        assert not OrderItem.objects.filter(order__in=finished).exists()
+        assert Order.objects.count() == 4
+        run = OrderArchiveRun.objects.get()
+        assert (run.orders, run.items, run.finished_at is not None) == (4, 8, True)
+
+    def test_respects_age(self, orders):
+        archive('--days', '398')
+        # Only the orders last changed 400 and 399 days ago.
+        assert ArchivedOrder.objects.count() == 2
+
+    def test_dry_run_writes_nothing(self, orders):
+        output = archive('--days', '30', '--batch-size', '3', '--dry-run')
+        assert 'Would archive 4 orders and 8 items' in output
+        assert 'in 2 batches' in output
+        assert not ArchivedOrder.objects.exists()
+        assert not OrderArchiveRun.objects.exists()
+
+    def test_resumes_interrupted_run(self, orders):
+        archive('--days', '30', '--batch-size', '1', '--max-batches', '2')
+        run = OrderArchiveRun.objects.get()
+        assert (run.orders, run.finished_at) == (2, None)
+        assert 'Would archive 2 orders' in archive('--dry-run')
+
+        output = archive('--batch-size', '1')
+        assert f'Resuming run #{run.pk}' in output
+        run.refresh_from_db()
+        assert (run.orders, run.items) == (4, 8)
+        assert run.finished_at is not None
+        assert ArchivedOrder.objects.count() == 4
+
+    def test_failed_batch_rolls_back(self, orders):
+        with mock.patch(
+            'products.archive.ArchivedOrderItem.objects.bulk_create', side_effect=RuntimeError
+        ):
+            with pytest.raises(RuntimeError):
+                archive('--days', '30', '--batch-size', '2')
+        assert not ArchivedOrder.objects.exists()
+        assert Order.objects.count() == 8
+        assert OrderArchiveRun.objects.get().last_order_id == 0
+
+    def test_rollups_are_kept(self, orders):
+        rebuild()
+        before = sorted(DailySales.objects.values_list('day', 'status', 'orders', 'revenue'))
+        products = list(ProductSales.objects.values_list('product', 'units', 'revenue'))
+        archive('--days', '30')
+        assert sorted(DailySales.objects.values_list('day', 'status', 'orders', 'revenue')) == before
+        rebuild()
+        assert sorted(DailySales.objects.values_list('day', 'status', 'orders', 'revenue')) == before
+        assert list(ProductSales.objects.values_list('product', 'units', 'revenue')) == products
+
+@pytest.mark.django_db
+class TestArchiveReadThrough:
+    @pytest.fixture(autouse=True)
+    def login(self, api_client, customer):
+        api_client.force_authenticate(user=customer.user)
+        self.client = api_client
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params or {})
+        assert response.status_code == 200
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content))
+        return json.loads(response.content)
+
+    def pages(self, params):
+        results = []
+        data = self.get(reverse('order-list'), {'page_size': 3, **params})
+        results += data['results']
+        while data['next']:
+            data = self.get(data['next'])
+            results += data['results']
+        return results
+
+    def test_listing_includes_archive_on_request(self, orders):
+        url = reverse('order-list')
+        before = self.pages({})
+        streamed = self.get(url, {'stream': 1})
+        assert [o['id'] for o in before] == [o.pk for o in reversed(orders)]
+        archive('--days', '30')
+
+        assert len(self.get(url)) == 4
+        assert self.pages({'include_archived': 1}) == before
+        assert self.get(url, {'stream': 1, 'include_archived': 1}) == streamed
+        merged = self.get(url, {'include_archived': 1, 'status': 'D,X', 'summary': 1})
+        assert [o['id'] for o in merged] == [o.pk for o in reversed(orders) if o.status in 'DX']
+
+    def test_detail_includes_archive_on_request(self, orders):
+        url = reverse('order-detail', args=[orders[0].pk])
+        before = self.get(url)
+        archive('--days', '30')
+        assert self.get(url, {'include_archived': 1}) == before
+        assert self.get(url, {'include_archived': 1, 'fields': 'id,status'}) == {
+            'id': orders[0].pk, 'status': 'D',
+        }
+
+    def test_other_customers_archive_is_hidden(self, orders):
+        archive('--days', '30')
+        other = User.objects.create_user(username='other', password='pass12345')
+        Customer.objects.create(user=other)
+        self.client.force_authenticate(user=other)
+        assert self.get(reverse('order-list'), {'include_archived': 1}) == []
+        response = self.client.get(
+            reverse('order-detail', args=[orders[0].pk]), {'include_archived': 1}
+        )
+        assert response.status_code != 200
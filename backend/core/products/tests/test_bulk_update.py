@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.cache import PRODUCTS, get_version
+from products.models import Product
+
+
+@pytest.fixture
+def products():
+    return [
+        Product.objects.create(name=f'Product {i}', description='', price='10.00', stock=5)
+        for i in range(3)
+    ]
+
+@pytest.mark.django_db
+class TestProductBulkUpdate:
+    url = reverse('product-bulk-update')
+
+    def test_applies_patches_and_reports_every_row(self, staff_client, products):
+        first, second, third = products
+        before = third.updated_at
+        version = get_version(PRODUCTS)
+        response = staff_client.post(self.url, [
+            {'id': first.id, 'price': '12.50'},
+            {'id': second.id, 'stock': 0, 'available': False},
+            {'id': third.id, 'price': '-1'},
+            {'id': 999999, 'stock': 1},
+            {'id': first.id, 'stock': 3},
+        ], format='json')
+
+        assert response.status_code == 200
+        assert response.data['updated'] == 2
+        assert [row['status'] for row in response.data['results']] == [
+            'updated', 'updated', 'invalid', 'not_found', 'invalid',
+        ]
+        first.refresh_from_db()
+        second.refresh_from_db()
+        third.refresh_from_db()
+        assert (first.price, first.stock) == (Decimal('12.50'), 5)
+        assert (second.stock, second.available) == (0, False)
+        assert third.price == Decimal('10.00') and third.updated_at == before
+        assert first.updated_at > before
+        assert get_version(PRODUCTS) != version
+
+    def test_uses_one_update_statement(self, staff_client, products):
+        patches = [{'id': product.id, 'stock': 9} for product in products]
+        with CaptureQueriesContext(connection) as ctx:
+            staff_client.post(self.url, patches, format='json')
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        assert len(updates) == 1
+
+    def test_rejects_oversized_batches(self, staff_client, products, settings):
+        settings.PRODUCTS_BULK_UPDATE_LIMIT = 2
+        patches = [{'id': product.id, 'stock': 1} for product in products]
+        response = staff_client.post(self.url, patches, format='json')
+        assert response.status_code == 400
+
+    def test_patch_needs_a_field(self, staff_client, products):
+        response = staff_client.post(self.url, [{'id': products[0].id}], format='json')
+        assert response.data['results'][0]['status'] == 'invalid'
+
+    def test_staff_only(self, authenticated_client, products):
+        response = authenticated_client.post(self.url, [{'id': products[0].id, 'stock': 1}], format='json')
+        assert response.status_code == 403
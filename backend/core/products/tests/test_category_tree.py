@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Category
+from products.tree import build_category_tree, get_category_tree
+
+
+@pytest.fixture
+def category_tree():
+    electronics = Category.objects.create(name='Electronics')
+    phones = Category.objects.create(name='Phones', parent=electronics)
+    laptops = Category.objects.create(name='Laptops', parent=electronics)
+    android = Category.objects.create(name='Android', parent=phones)
+    books = Category.objects.create(name='Books')
+    return {
+        'electronics': electronics,
+        'phones': phones,
+        'laptops': laptops,
+        'android': android,
+        'books': books,
+    }
+
+@pytest.mark.django_db
+class TestBuildCategoryTree:
+    def test_builds_tree_in_one_query(self, category_tree):
+        with CaptureQueriesContext(connection) as ctx:
+            nodes, bounds = build_category_tree()
+        assert len(ctx.captured_queries) == 1
+        assert set(bounds) == set(nodes)
+        assert len(nodes) == 5
+
+    def test_nests_children_in_tree_order(self, category_tree):
+        nodes, _ = build_category_tree()
+        electronics = nodes[category_tree['electronics'].id]
+        assert [child['name'] for child in electronics['children']] == ['Laptops', 'Phones']
+        phones = electronics['children'][1]
+        assert phones['parent'] == category_tree['electronics'].id
+        assert [child['name'] for child in phones['children']] == ['Android']
+
+    def test_cached_tree_is_reused(self, category_tree):
+        get_category_tree()
+        with CaptureQueriesContext(connection) as ctx:
+            get_category_tree()
+        assert len(ctx.captured_queries) == 0
+
+    def test_save_invalidates_cached_tree(self, category_tree):
+        get_category_tree()
+        Category.objects.create(name='Tablets', parent=category_tree['electronics'])
+        nodes = get_category_tree()
+        electronics = nodes[category_tree['electronics'].id]
+        assert 'Tablets' in [child['name'] for child in electronics['children']]
+
+    def test_move_invalidates_cached_tree(self, category_tree):
+        get_category_tree()
+        android = Category.objects.get(pk=category_tree['android'].pk)
+        android.move_to(Category.objects.get(pk=category_tree['books'].pk))
+        nodes = get_category_tree()
+        assert nodes[category_tree['android'].id]['parent'] == category_tree['books'].id
+        assert nodes[category_tree['phones'].id]['children'] == []
+
+    def test_delete_invalidates_cached_tree(self, category_tree):
+        get_category_tree()
+        category_tree['phones'].delete()
+        nodes = get_category_tree()
+        assert category_tree['phones'].id not in nodes
+        assert category_tree['android'].id not in nodes
+
+@pytest.mark.django_db
+class TestCategoryListView:
+    def test_flat_list_matches_nested_serializer_shape(self, api_client, category_tree):
+        response = api_client.get(reverse('category-list'))
+        assert response.status_code == 200
+        assert len(response.data) == 5
+        phones = next(c for c in response.data if c['name'] == 'Phones')
+        assert phones['parent'] == category_tree['electronics'].id
+        assert [child['name'] for child in phones['children']] == ['Android']
+        assert phones['children'][0]['children'] == []
+
+    def test_tree_mode_returns_roots_only(self, api_client, category_tree):
+        response = api_client.get(reverse('category-list'), {'tree': '1'})
+        assert [c['name'] for c in response.data] == ['Books', 'Electronics']
+
+    def test_list_runs_constant_queries(self, api_client, category_tree):
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(reverse('category-list'))
+        assert len(ctx.captured_queries) <= 1
+
+    def test_detail_reads_children_from_tree(self, api_client, category_tree):
+        response = api_client.get(
+            reverse('category-detail', args=[category_tree['electronics'].id])
+        )
+        assert [child['name'] for child in response.data['children']] == ['Laptops', 'Phones']
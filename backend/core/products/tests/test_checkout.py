@@ -0,0 +1,86 @@
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Cart, CartItem, Order, OrderItem, Product
+
+
+@pytest.fixture
+def cart(customer):
+    return Cart.objects.create(customer=customer)
+
+@pytest.fixture
+def fill_cart(cart):
+    def fill(count, quantity=2, stock=10):
+        products = Product.objects.bulk_create(
+            Product(name=f'Product {i}', description='', price='2.50', stock=stock)
+            for i in range(count)
+        )
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=quantity) for product in products
+        )
+        return products
+    return fill
+
+def checkout(client):
+    return client.post(reverse('checkout'), {'shipping_address': 'Nairobi'}, format='json')
+
+@pytest.mark.django_db
+class TestCheckout:
+    def test_creates_order_and_takes_stock(self, customer_client, cart, fill_cart):
+        products = fill_cart(3)
+        response = checkout(customer_client)
+        assert response.status_code == 201
+        order = Order.objects.get()
+        assert order.total == Decimal('15.00')
+        assert order.items.count() == 3
+        assert set(OrderItem.objects.values_list('price', flat=True)) == {Decimal('5.00')}
+        assert all(p.stock == 8 for p in Product.objects.filter(pk__in=[p.pk for p in products]))
+        assert not cart.items.exists()
+        assert response.data['total'] == '15.00'
+
+    def test_query_count_does_not_grow_with_cart(self, customer_client, cart, fill_cart):
+        def count(lines):
+            fill_cart(lines)
+            with CaptureQueriesContext(connection) as ctx:
+                assert checkout(customer_client).status_code == 201
+            return len(ctx.captured_queries)
+        assert count(2) == count(40)
+
+    def test_insufficient_stock_writes_nothing(self, customer_client, cart, fill_cart):
+        products = fill_cart(2, quantity=3, stock=5)
+        Product.objects.filter(pk=products[1].pk).update(stock=2)
+        response = checkout(customer_client)
+        assert response.status_code == 400
+        assert response.data['error'] == 'Not enough stock for: Product 1'
+        assert not Order.objects.exists()
+        assert cart.items.count() == 2
+        assert list(Product.objects.order_by('pk').values_list('stock', flat=True)) == [5, 2]
+
+    def test_unavailable_product(self, customer_client, cart, fill_cart):
+        products = fill_cart(1)
+        Product.objects.filter(pk=products[0].pk).update(available=False)
+        assert checkout(customer_client).status_code == 400
+        assert not Order.objects.exists()
+
+    def test_empty_cart(self, customer_client, cart):
+        response = checkout(customer_client)
+        assert response.status_code == 400
+        assert response.data['error'] == 'Your cart is empty'
+
+    def test_notifications_are_sent_after_commit(
+        self, customer_client, cart, fill_cart, settings, django_capture_on_commit_callbacks
+    ):
+        settings.PRODUCTS_BACKGROUND_WORKERS = 0
+        fill_cart(1)
+        with mock.patch('products.checkout.send_order_notifications') as send:
+            with django_capture_on_commit_callbacks() as callbacks:
+                checkout(customer_client)
+            send.assert_not_called()
+            for callback in callbacks:
+                callback()
+        send.assert_called_once_with(Order.objects.get())
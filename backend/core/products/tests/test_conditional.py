@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Category, Product
+
+
+@pytest.fixture
+def product():
+    product = Product.objects.create(name='Radio', description='FM radio', price='25.00', stock=4)
+    product.categories.add(Category.objects.create(name='Audio'))
+    return product
+
+@pytest.mark.django_db
+class TestProductListConditionalGet:
+    def test_etag_round_trip_returns_304(self, authenticated_client, product):
+        response = authenticated_client.get(reverse('product-list'))
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(reverse('product-list'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        # Only the validator aggregate ran; nothing was serialized.
+        assert len(ctx.captured_queries) == 1
+
+    def test_update_changes_etag(self, api_client, product):
+        etag = api_client.get(reverse('product-list'))['ETag']
+        product.price = '30.00'
+        product.save()
+        response = api_client.get(reverse('product-list'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_delete_changes_etag(self, api_client, product):
+        Product.objects.create(name='Older', description='', price='1.00', stock=1)
+        etag = api_client.get(reverse('product-list'))['ETag']
+        Product.objects.get(name='Older').delete()
+        response = api_client.get(reverse('product-list'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    def test_category_change_changes_etag(self, api_client, product):
+        etag = api_client.get(reverse('product-list'))['ETag']
+        product.categories.add(Category.objects.create(name='Gifts'))
+        response = api_client.get(reverse('product-list'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    def test_category_delete_changes_etag(self, authenticated_client, product):
+        etag = authenticated_client.get(reverse('product-list'))['ETag']
+        product.categories.get().delete()
+        response = authenticated_client.get(reverse('product-list'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data[0]['categories'] == []
+
+    def test_filters_get_their_own_etag(self, api_client, product):
+        plain = api_client.get(reverse('product-list'))['ETag']
+        filtered = api_client.get(reverse('product-list'), {'category': 999})['ETag']
+        assert plain != filtered
+
+@pytest.mark.django_db
+class TestProductDetailConditionalGet:
+    def test_if_none_match(self, authenticated_client, product):
+        url = reverse('product-detail', args=[product.id])
+        response = authenticated_client.get(url)
+        assert 'Last-Modified' in response
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 304
+        assert len(ctx.captured_queries) == 1
+
+    def test_category_delete_changes_etag(self, authenticated_client, product):
+        url = reverse('product-detail', args=[product.id])
+        etag = authenticated_client.get(url)['ETag']
+        product.categories.get().delete()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data['categories'] == []
+
+    def test_if_modified_since(self, api_client, product):
+        url = reverse('product-detail', args=[product.id])
+        last_modified = api_client.get(url)['Last-Modified']
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    def test_missing_product_is_404(self, api_client):
+        response = api_client.get(reverse('product-detail', args=[999]))
+        assert response.status_code == 404
+
+@pytest.mark.django_db
+class TestCategoryListConditionalGet:
+    def test_etag_follows_tree_content(self, api_client, product):
+        etag = api_client.get(reverse('category-list'))['ETag']
+        assert api_client.get(reverse('category-list'), HTTP_IF_NONE_MATCH=etag).status_code == 304
+        Category.objects.create(name='Video')
+        assert api_client.get(reverse('category-list'), HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,90 @@
+import csv
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from products.archive import archive_batch, start_run
+from products.models import Category, Order, OrderItem, Product
+
+
+@pytest.fixture
+def catalogue():
+    category = Category.objects.create(name='Phones')
+    phone = Product.objects.create(name='Phone', description='Smart, "new"', price='10.50', stock=2)
+    phone.categories.add(category)
+    cable = Product.objects.create(name='Cable', description='', price='1.00', stock=9)
+    return phone, cable, category
+
+@pytest.fixture
+def orders(catalogue, customer):
+    phone, cable, _ = catalogue
+    order = Order.objects.create(customer=customer, shipping_address='Nairobi', total='12.50')
+    OrderItem.objects.create(order=order, product=phone, quantity=1, price='10.50')
+    OrderItem.objects.create(order=order, product=cable, quantity=2, price='2.00')
+    empty = Order.objects.create(customer=customer, shipping_address='Mombasa')
+    return order, empty
+
+def stream(response):
+    assert response.status_code == 200
+    return b''.join(response.streaming_content).decode('utf-8')
+
+@pytest.mark.django_db
+class TestExports:
+    def test_product_csv(self, staff_client, catalogue):
+        phone, cable, category = catalogue
+        response = staff_client.get(reverse('product-export'))
+        assert response['Content-Type'] == 'text/csv'
+        rows = list(csv.DictReader(StringIO(stream(response))))
+        assert [row['name'] for row in rows] == ['Phone', 'Cable']
+        assert rows[0]['description'] == 'Smart, "new"'
+        assert rows[0]['categories'] == str(category.id)
+        assert rows[0]['price'] == '10.50'
+
+    def test_order_ndjson_has_one_line_per_item(self, staff_client, orders):
+        order, empty = orders
+        response = staff_client.get(reverse('order-export'), {'output': 'ndjson'})
+        rows = [json.loads(line) for line in stream(response).splitlines()]
+        assert [(row['id'], row['quantity']) for row in rows] == [
+            (order.id, 1), (order.id, 2), (empty.id, None),
+        ]
+        assert rows[0]['total'] == '12.50'
+
+    def test_order_export_includes_archived_orders(self, staff_client, orders):
+        order, empty = orders
+        Order.objects.filter(pk=order.pk).update(status='D')
+        run, _ = start_run(timezone.now() + timedelta(seconds=1))
+        assert archive_batch(run, 10) == 1
+        response = staff_client.get(reverse('order-export'), {'output': 'ndjson'})
+        rows = [json.loads(line) for line in stream(response).splitlines()]
+        assert [(row['id'], row['quantity'], row['status']) for row in rows] == [
+            (order.id, 1, 'D'), (order.id, 2, 'D'), (empty.id, None, 'P'),
+        ]
+
+    def test_since_limits_to_recent_changes(self, staff_client, catalogue):
+        phone, cable, _ = catalogue
+        Product.objects.filter(pk=phone.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = staff_client.get(reverse('product-export'), {'output': 'ndjson', 'since': since})
+        rows = [json.loads(line) for line in stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [cable.id]
+
+    def test_invalid_parameters(self, staff_client):
+        assert staff_client.get(reverse('product-export'), {'output': 'xml'}).status_code == 400
+        assert staff_client.get(reverse('order-export'), {'since': 'yesterday'}).status_code == 400
+
+    def test_staff_only(self, authenticated_client):
+        assert authenticated_client.get(reverse('product-export')).status_code == 403
+
+    def test_command_writes_same_rows(self, tmp_path, orders):
+        path = tmp_path / 'orders.csv'
+        call_command('export_data', 'orders', '--output', str(path), '--chunk-size', '1', stderr=StringIO())
+        rows = list(csv.DictReader(path.open()))
+        assert len(rows) == 3
+        out = StringIO()
+        call_command('export_data', 'products', '--format', 'ndjson', stdout=out)
+        assert len(out.getvalue().splitlines()) == 2
@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Category, Product
+
+
+@pytest.fixture
+def catalogue():
+    electronics = Category.objects.create(name='Electronics')
+    phones = Category.objects.create(name='Phones', parent=electronics)
+    tablets = Category.objects.create(name='Tablets', parent=electronics)
+    books = Category.objects.create(name='Books')
+
+    def make(name, price, *categories, **kwargs):
+        product = Product.objects.create(
+            name=name, description='', price=price, stock=1, **kwargs
+        )
+        product.categories.set(categories)
+        return product
+
+    make('Phablet', '700.00', phones, tablets)
+    make('Pixel', '450.00', phones)
+    make('TV', '12000.00', electronics)
+    make('Novel', '15.00', books)
+    make('Hidden', '10.00', books, available=False)
+    make('Gift Card', '50.00')
+    return {'electronics': electronics, 'phones': phones, 'tablets': tablets, 'books': books}
+
+def category_counts(response):
+    return {row['name']: row['count'] for row in response.data['categories']}
+
+@pytest.mark.django_db
+class TestProductFacets:
+    def test_category_counts_roll_up_distinct_products(self, api_client, catalogue):
+        response = api_client.get(reverse('product-facets'))
+        assert response.status_code == 200
+        # Phablet is in two Electronics subcategories but counts once.
+        assert category_counts(response) == {
+            'Books': 1, 'Electronics': 3, 'Phones': 2, 'Tablets': 1,
+        }
+
+    def test_price_buckets(self, api_client, catalogue):
+        response = api_client.get(reverse('product-facets'))
+        assert [(row['min'], row['max'], row['count']) for row in response.data['price']] == [
+            ('0', '500', 3), ('500', '1000', 1), ('1000', '5000', 0),
+            ('5000', '10000', 0), ('10000', None, 1),
+        ]
+
+    def test_respects_category_filter(self, api_client, catalogue):
+        response = api_client.get(
+            reverse('product-facets'),
+            {'category': catalogue['electronics'].id, 'include_descendants': '1'},
+        )
+        assert category_counts(response)['Electronics'] == 3
+        assert 'Books' not in category_counts(response)
+        assert sum(row['count'] for row in response.data['price']) == 3
+
+    def test_single_facet(self, api_client, catalogue):
+        response = api_client.get(reverse('product-facets'), {'facets': 'price'})
+        assert set(response.data) == {'price'}
+
+    def test_unknown_facet_is_rejected(self, api_client, catalogue):
+        response = api_client.get(reverse('product-facets'), {'facets': 'colour'})
+        assert response.status_code == 400
+
+    def test_one_aggregate_query_then_cached(self, api_client, catalogue):
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(reverse('product-facets'))
+        assert sum('UNION ALL' in q['sql'] for q in ctx.captured_queries) == 1
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(reverse('product-facets'))
+        assert len(ctx.captured_queries) == 0
+
+    def test_cache_invalidated_when_products_change(self, api_client, catalogue):
+        api_client.get(reverse('product-facets'))
+        product = Product.objects.create(name='Kindle', description='', price='90.00', stock=1)
+        product.categories.add(catalogue['tablets'])
+        response = api_client.get(reverse('product-facets'))
+        assert category_counts(response)['Tablets'] == 2
+        assert category_counts(response)['Electronics'] == 4
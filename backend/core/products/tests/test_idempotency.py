@@ -0,0 +1,156 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Cart, CartItem, IdempotencyKey, Order, Product
+from myuser.models import Customer
+
+User = get_user_model()
+
+
+@pytest.fixture
+def product():
+    return Product.objects.create(name='Phone', description='', price='10.00', stock=10)
+
+@pytest.fixture
+def cart(customer, product):
+    cart = Cart.objects.create(customer=customer)
+    CartItem.objects.create(cart=cart, product=product, quantity=2)
+    return cart
+
+def checkout(client, key, address='Nairobi'):
+    return client.post(
+        reverse('checkout'), {'shipping_address': address}, format='json',
+        HTTP_IDEMPOTENCY_KEY=key,
+    )
+
+def create_order(client, customer, product, key):
+    return client.post(reverse('order-list'), {
+        'customer': customer.id, 'shipping_address': 'Nairobi',
+        'items': [{'product': product.id, 'quantity': 1}],
+    }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+@pytest.mark.django_db
+class TestIdempotency:
+    def test_checkout_retry_replays_response(self, customer_client, cart, product):
+        first = checkout(customer_client, 'abc')
+        with mock.patch('products.views.checkout') as run:
+            second = checkout(customer_client, 'abc')
+        run.assert_not_called()
+        assert first.status_code == second.status_code == 201
+        assert second.json() == first.json()
+        assert second['Idempotent-Replayed'] == 'true'
+        assert Order.objects.count() == 1
+        product.refresh_from_db()
+        assert product.stock == 8
+
+    def test_order_create_retry_replays_response(self, customer_client, customer, product):
+        first = create_order(customer_client, customer, product, 'abc')
+        second = create_order(customer_client, customer, product, 'abc')
+        assert first.status_code == second.status_code == 201
+        assert second.json() == first.json()
+        assert Order.objects.count() == 1
+
+    def test_without_key_requests_are_not_deduplicated(self, customer_client, customer, product):
+        for _ in range(2):
+            response = customer_client.post(reverse('order-list'), {
+                'customer': customer.id, 'shipping_address': 'Nairobi',
+                'items': [{'product': product.id, 'quantity': 1}],
+            }, format='json')
+            assert response.status_code == 201
+        assert Order.objects.count() == 2
+
+    def test_key_reused_for_another_request(self, customer_client, cart):
+        checkout(customer_client, 'abc')
+        response = checkout(customer_client, 'abc', address='Mombasa')
+        assert response.status_code == 422
+        assert Order.objects.count() == 1
+
+    def test_keys_are_per_user(self, customer_client, customer, product):
+        create_order(customer_client, customer, product, 'abc')
+        other = User.objects.create_user(username='other', password='pass12345')
+        customer_client.force_authenticate(user=other)
+        response = create_order(customer_client, Customer.objects.create(user=other), product, 'abc')
+        assert response.status_code == 201
+        assert 'Idempotent-Replayed' not in response
+        assert Order.objects.count() == 2
+
+    def test_client_errors_are_replayed(self, customer_client, customer, product):
+        cart = Cart.objects.create(customer=customer)
+        assert checkout(customer_client, 'abc').status_code == 400
+        CartItem.objects.create(cart=cart, product=product)
+        # The cart was empty the first time round.
+        assert checkout(customer_client, 'abc').status_code == 400
+        assert not Order.objects.exists()
+
+    def test_server_errors_release_the_key(self, customer_client, cart):
+        with mock.patch('products.views.checkout', side_effect=RuntimeError):
+            assert checkout(customer_client, 'abc').status_code == 500
+        assert not IdempotencyKey.objects.exists()
+        assert checkout(customer_client, 'abc').status_code == 201
+
+    def test_failed_request_rolls_back_with_its_claim(self, customer_client, cart, product):
+        save = IdempotencyKey.save
+
+        def crash(record, *args, **kwargs):
+            # The worker dies after the order is written, storing the response.
+            if kwargs.get('update_fields'):
+                raise RuntimeError
+            return save(record, *args, **kwargs)
+
+        with mock.patch.object(IdempotencyKey, 'save', crash):
+            with pytest.raises(RuntimeError):
+                checkout(customer_client, 'abc')
+        assert not IdempotencyKey.objects.exists()
+        assert not Order.objects.exists()
+        product.refresh_from_db()
+        assert product.stock == 10
+        assert checkout(customer_client, 'abc').status_code == 201
+
+    def test_duplicate_waits_for_in_flight_request(self, customer_client, customer, cart):
+        record = IdempotencyKey.objects.create(user=customer.user, key='abc', fingerprint='')
+
+        def finish(seconds):
+            # The in-flight request completes while the duplicate waits.
+            checkout(customer_client, 'first')
+            done = IdempotencyKey.objects.get(key='first')
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                fingerprint=done.fingerprint, status_code=done.status_code,
+                response=done.response, completed_at=done.completed_at,
+            )
+
+        with mock.patch('products.idempotency.time.sleep', side_effect=finish) as sleep:
+            response = checkout(customer_client, 'abc')
+        assert sleep.call_count == 1
+        assert response.status_code == 201
+        assert response['Idempotent-Replayed'] == 'true'
+        assert Order.objects.count() == 1
+
+    def test_duplicate_gives_up_after_wait(self, customer_client, customer, cart, settings):
+        settings.PRODUCTS_IDEMPOTENCY_WAIT = 0
+        IdempotencyKey.objects.create(user=customer.user, key='abc', fingerprint='')
+        assert checkout(customer_client, 'abc').status_code == 409
+        assert not Order.objects.exists()
+
+    def test_expired_key_runs_again(self, customer_client, customer, product, settings):
+        create_order(customer_client, customer, product, 'abc')
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(seconds=settings.PRODUCTS_IDEMPOTENCY_TTL + 1)
+        )
+        assert 'Idempotent-Replayed' not in create_order(customer_client, customer, product, 'abc')
+        assert Order.objects.count() == 2
+
+    def test_purge_command(self, customer, settings):
+        IdempotencyKey.objects.create(user=customer.user, key='old', fingerprint='')
+        IdempotencyKey.objects.create(user=customer.user, key='new', fingerprint='')
+        IdempotencyKey.objects.filter(key='old').update(
+            created_at=timezone.now() - timedelta(seconds=settings.PRODUCTS_IDEMPOTENCY_TTL + 1)
+        )
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        assert list(IdempotencyKey.objects.values_list('key', flat=True)) == ['new']
@@ -0,0 +1,86 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+from products.images import render_variants
+from products.models import Product
+from products.serializers import ProductSerializer
+
+
+def png(size=(1200, 800), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.PRODUCTS_BACKGROUND_WORKERS = 0
+    return tmp_path
+
+def test_render_variants_keeps_aspect_ratio():
+    rendered = render_variants(png())
+    assert [(name, width, height) for name, width, height, _ in rendered] == [
+        ('thumbnail', 150, 100), ('card', 400, 267), ('detail', 1000, 667),
+    ]
+    for _, width, _, encoded in rendered:
+        assert Image.open(BytesIO(encoded['webp'])).format == 'WEBP'
+        assert Image.open(BytesIO(encoded['jpeg'])).width == width
+
+def test_small_images_are_not_upscaled():
+    rendered = render_variants(png(size=(120, 60)))
+    assert {(width, height) for _, width, height, _ in rendered} == {(120, 60)}
+
+@pytest.mark.django_db
+class TestImagePipeline:
+    def test_upload_generates_variants_after_commit(self, media, django_capture_on_commit_callbacks):
+        product = Product(name='Shoe', description='', price='5.00')
+        product.image.save('shoe.png', ContentFile(png()), save=False)
+        with django_capture_on_commit_callbacks(execute=True):
+            product.save()
+
+        product.refresh_from_db()
+        variants = product.image_variants
+        assert variants['source'] == product.image.name
+        assert [size['name'] for size in variants['sizes']] == ['thumbnail', 'card', 'detail']
+        for size in variants['sizes']:
+            assert (media / size['webp']).exists()
+            assert (media / size['jpeg']).exists()
+
+        srcset = ProductSerializer(product).data['image_srcset']
+        assert srcset['webp'].startswith(f"/media/{variants['sizes'][0]['webp']} 150w, ")
+        assert srcset['jpeg'].endswith(' 1000w')
+
+    def test_variant_names_are_content_hashed(self, media, django_capture_on_commit_callbacks):
+        data = png()
+        products = []
+        with django_capture_on_commit_callbacks(execute=True):
+            for name in ('a.png', 'b.png'):
+                product = Product(name=name, description='', price='1.00')
+                product.image.save(name, ContentFile(data))
+                products.append(product)
+        first, second = (Product.objects.get(pk=p.pk).image_variants for p in products)
+        assert first == second
+
+    def test_no_image_means_no_srcset(self):
+        product = Product.objects.create(name='Plain', description='', price='1.00')
+        assert ProductSerializer(product).data['image_srcset'] is None
+
+    def test_backfill_command(self, media):
+        product = Product.objects.create(name='Old', description='', price='1.00')
+        product.image.save('old.png', ContentFile(png(size=(500, 500))), save=False)
+        # Bypass the signal to simulate an image uploaded before variants existed.
+        Product.objects.filter(pk=product.pk).update(image=product.image.name)
+
+        out = StringIO()
+        call_command('generate_image_variants', workers=1, stdout=out)
+        assert 'Generated variants for 1 products' in out.getvalue()
+        sizes = Product.objects.get(pk=product.pk).image_variants['sizes']
+        assert [size['width'] for size in sizes] == [150, 400, 500]
+
+        out = StringIO()
+        call_command('generate_image_variants', workers=1, stdout=out)
+        assert 'Generated variants for 0 products' in out.getvalue()
@@ -0,0 +1,86 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from products.cache import PRODUCTS, get_version
+from products.models import Category, Product
+
+
+@pytest.fixture
+def categories():
+    electronics = Category.objects.create(name='Electronics')
+    phones = Category.objects.create(name='Phones', parent=electronics)
+    return electronics, phones
+
+def run(path, *args):
+    out, err = StringIO(), StringIO()
+    call_command('import_products', str(path), *args, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+@pytest.mark.django_db
+class TestImportProducts:
+    def test_imports_csv_in_batches(self, tmp_path, categories):
+        electronics, phones = categories
+        path = tmp_path / 'products.csv'
+        path.write_text(
+            'name,description,price,stock,available,categories\n'
+            'Phone,Smart,10.50,3,true,Electronics/Phones|Electronics\n'
+            'Cable,,0.99,,no,Electronics\n'
+            'Charger,Fast,5.00,1,1,\n'
+        )
+        version = get_version(PRODUCTS)
+        out, err = run(path, '--batch-size', '2')
+
+        assert err == ''
+        assert 'rows/s' in out
+        assert Product.objects.count() == 3
+        phone = Product.objects.get(name='Phone')
+        assert set(phone.categories.values_list('id', flat=True)) == {electronics.id, phones.id}
+        cable = Product.objects.get(name='Cable')
+        assert (cable.stock, cable.available) == (0, False)
+        assert not Product.objects.get(name='Charger').categories.exists()
+        assert get_version(PRODUCTS) != version
+
+    def test_invalid_rows_are_skipped(self, tmp_path, categories):
+        path = tmp_path / 'products.csv'
+        path.write_text(
+            'name,price,categories\n'
+            'Good,1.00,Electronics\n'
+            ',2.00,\n'
+            'Bad price,abc,\n'
+            'Lost,3.00,Garden/Tools\n'
+        )
+        out, err = run(path)
+        assert list(Product.objects.values_list('name', flat=True)) == ['Good']
+        assert 'Row 2' in err and 'Row 3' in err and "Unknown category 'Garden/Tools'" in err
+        assert 'skipped 3' in out
+
+    def test_malformed_jsonl_lines_are_reported(self, tmp_path, categories):
+        path = tmp_path / 'products.jsonl'
+        path.write_text(
+            '{"name": "Good", "price": "1.00"}\n'
+            '\n'
+            '{"name": "Broken", "price": \n'
+            '["Not", "an", "object"]\n'
+        )
+        out, err = run(path)
+        assert list(Product.objects.values_list('name', flat=True)) == ['Good']
+        assert 'Row 2: line 3: invalid JSON' in err
+        assert 'Row 3: line 4: expected an object, got list' in err
+        assert 'cannot be null' not in err
+        assert 'skipped 2' in out
+
+    def test_jsonl_can_create_categories(self, tmp_path, categories):
+        path = tmp_path / 'products.jsonl'
+        path.write_text('\n'.join(json.dumps(row) for row in [
+            {'name': 'Rake', 'price': '7.25', 'categories': ['Garden/Tools']},
+            {'name': 'Hoe', 'price': 4, 'stock': 2, 'categories': ['Garden/Tools', 'Garden']},
+        ]))
+        run(path, '--create-categories')
+
+        tools = Category.objects.get(name='Tools')
+        assert tools.parent.name == 'Garden'
+        assert Category.objects.filter(name='Garden').count() == 1
+        assert list(tools.product_set.order_by('name').values_list('name', flat=True)) == ['Hoe', 'Rake']
@@ -0,0 +1,95 @@
+import time
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import DailySales, Order
+from products.rollups import rebuild
+
+User = get_user_model()
+
+
+@pytest.fixture
+def make_orders(customer):
+    def make(statuses):
+        orders = Order.objects.bulk_create(
+            Order(customer=customer, shipping_address='Nairobi', status=code, total='10.00')
+            for code in statuses
+        )
+        rebuild()
+        return orders
+    return make
+
+def move(client, ids, code):
+    return client.post(reverse('order-bulk-status'), {'ids': ids, 'status': code}, format='json')
+
+@pytest.mark.django_db
+class TestOrderBulkStatus:
+    def test_applies_allowed_transitions(self, staff_client, make_orders):
+        confirmed, pending, delivered = make_orders('CPD')
+        response = move(staff_client, [confirmed.id, pending.id, delivered.id, 999], 'S')
+        assert response.status_code == 200
+        assert response.data['updated'] == 1
+        assert response.data['results'] == [
+            {'id': confirmed.id, 'status': 'updated'},
+            {'id': pending.id, 'status': 'invalid',
+             'errors': {'status': ['Cannot move from Pending to Shipped.']}},
+            {'id': delivered.id, 'status': 'invalid',
+             'errors': {'status': ['Cannot move from Delivered to Shipped.']}},
+            {'id': 999, 'status': 'not_found'},
+        ]
+        assert list(Order.objects.order_by('pk').values_list('status', flat=True)) == ['S', 'P', 'D']
+
+    def test_updates_rollups(self, staff_client, make_orders):
+        make_orders('PPC')
+        move(staff_client, list(Order.objects.values_list('pk', flat=True)), 'X')
+        assert dict(DailySales.objects.filter(orders__gt=0).values_list('status', 'orders')) == {'X': 3}
+
+    def test_queues_notifications(
+        self, staff_client, make_orders, settings, django_capture_on_commit_callbacks
+    ):
+        settings.PRODUCTS_BACKGROUND_WORKERS = 0
+        orders = make_orders('CC')
+        with mock.patch('products.views.notify_orders') as notify:
+            with django_capture_on_commit_callbacks() as callbacks:
+                move(staff_client, [o.id for o in orders], 'S')
+            notify.assert_not_called()
+            for callback in callbacks:
+                callback()
+        notify.assert_called_once_with([o.id for o in orders])
+
+    def test_confirming_sends_nothing(
+        self, staff_client, make_orders, django_capture_on_commit_callbacks
+    ):
+        orders = make_orders('P')
+        with django_capture_on_commit_callbacks() as callbacks:
+            move(staff_client, [orders[0].id], 'C')
+        assert callbacks == []
+
+    def test_five_hundred_orders(self, staff_client, make_orders):
+        def timed(orders, code):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = move(staff_client, [o.id for o in orders], code)
+                elapsed = time.perf_counter() - started
+            assert response.data['updated'] == len(orders)
+            return ctx.captured_queries, elapsed
+        few, _ = timed(make_orders('C' * 2), 'S')
+        many, elapsed = timed(make_orders('C' * 500), 'S')
+        assert len(many) == len(few)
+        assert sum(q['sql'].startswith('UPDATE "products_order"') for q in many) == 1
+        assert elapsed < 1
+
+    def test_validation(self, staff_client, make_orders, settings):
+        settings.PRODUCTS_BULK_STATUS_LIMIT = 2
+        assert move(staff_client, [1], 'Z').status_code == 400
+        assert move(staff_client, [], 'S').status_code == 400
+        assert move(staff_client, [1, 2, 3], 'S').status_code == 400
+
+    def test_staff_only(self, api_client, make_orders):
+        api_client.force_authenticate(user=User.objects.create_user(username='x', password='pass12345'))
+        assert move(api_client, [1], 'S').status_code == 403
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Order, OrderItem, Product
+
+
+@pytest.fixture
+def products():
+    return [
+        Product.objects.create(name=f'Product {i}', description='', price=f'{i + 1}.50', stock=50)
+        for i in range(3)
+    ]
+
+def create_order(client, customer, items):
+    return client.post(reverse('order-list'), {
+        'customer': customer.id, 'shipping_address': 'Nairobi', 'items': items,
+    }, format='json')
+
+@pytest.mark.django_db
+class TestOrderCreate:
+    def test_creates_order_with_items_and_total(self, customer_client, customer, products):
+        response = create_order(customer_client, customer, [
+            {'product': products[0].id, 'quantity': 2},
+            {'product': products[2].id, 'quantity': 1},
+        ])
+        assert response.status_code == 201
+        order = Order.objects.get()
+        assert order.total == Decimal('6.50')
+        assert sorted(order.items.values_list('price', flat=True)) == [Decimal('3.00'), Decimal('3.50')]
+        assert response.data['total'] == '6.50'
+        assert len(response.data['items']) == 2
+        assert list(Product.objects.order_by('pk').values_list('stock', flat=True)) == [48, 50, 49]
+
+    def test_query_count_does_not_grow_with_lines(self, customer_client, customer, products):
+        def count(lines):
+            items = [{'product': products[i % 3].id, 'quantity': 1} for i in range(lines)]
+            with CaptureQueriesContext(connection) as ctx:
+                assert create_order(customer_client, customer, items).status_code == 201
+            return len(ctx.captured_queries)
+        assert count(3) == count(60)
+
+    def test_unknown_products_are_reported_together(self, customer_client, customer, products):
+        response = create_order(customer_client, customer, [
+            {'product': 999, 'quantity': 1},
+            {'product': products[0].id, 'quantity': 1},
+            {'product': 998, 'quantity': 1},
+        ])
+        assert response.status_code == 400
+        assert response.data['items']['non_field_errors'] == ['Unknown product ids: 998, 999.']
+        assert not Order.objects.exists()
+        assert not OrderItem.objects.exists()
+
+    def test_invalid_quantity(self, customer_client, customer, products):
+        response = create_order(customer_client, customer, [{'product': products[0].id, 'quantity': 0}])
+        assert response.status_code == 400
+        assert 'quantity' in response.data['items'][0]
+
+    def test_short_stock_is_rejected(self, customer_client, customer, products):
+        Product.objects.filter(pk=products[1].pk).update(stock=1)
+        response = create_order(customer_client, customer, [
+            {'product': products[0].id, 'quantity': 2},
+            {'product': products[1].id, 'quantity': 1},
+            {'product': products[1].id, 'quantity': 1},
+        ])
+        assert response.status_code == 400
+        assert response.data['items'] == ['Not enough stock for: Product 1']
+        assert not Order.objects.exists()
+        assert list(Product.objects.order_by('pk').values_list('stock', flat=True)) == [50, 1, 50]
+
+    def test_unavailable_product_is_rejected(self, customer_client, customer, products):
+        Product.objects.filter(pk=products[0].pk).update(available=False)
+        response = create_order(customer_client, customer, [{'product': products[0].id, 'quantity': 1}])
+        assert response.status_code == 400
+        assert not Order.objects.exists()
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Category, Order, OrderItem, Product
+from myuser.models import Customer
+
+User = get_user_model()
+
+
+@pytest.fixture
+def customers():
+    return [
+        Customer.objects.create(user=User.objects.create_user(username=f'buyer{i}', password='pass12345'))
+        for i in range(2)
+    ]
+
+def make_orders(customers, count):
+    category = Category.objects.create(name=f'Category {count}')
+    orders = []
+    for i in range(count):
+        product = Product.objects.create(name=f'Product {i}', description='', price='2.00')
+        product.categories.add(category)
+        order = Order.objects.create(
+            customer=customers[i % 2], shipping_address='Nairobi', status='PC'[i % 2]
+        )
+        OrderItem.objects.create(order=order, product=product, quantity=2, price='4.00')
+        orders.append(order)
+    return orders
+
+@pytest.mark.django_db
+class TestOrderList:
+    def test_query_count_is_constant(self, staff_client, customers, count_queries):
+        make_orders(customers, 2)
+        few = count_queries(staff_client, reverse('order-list'), {'page_size': 50})
+        make_orders(customers, 20)
+        assert count_queries(staff_client, reverse('order-list'), {'page_size': 50}) == few
+        assert count_queries(staff_client, reverse('order-list'), {}) == few
+
+    def test_summary_leaves_out_products(self, staff_client, customers, count_queries):
+        order = make_orders(customers, 1)[0]
+        full = count_queries(staff_client, reverse('order-list'), {})
+        assert count_queries(staff_client, reverse('order-list'), {'summary': 1}) < full
+
+        response = staff_client.get(reverse('order-list'), {'summary': 1})
+        item = response.data[0]['items'][0]
+        assert item['product'] == order.items.get().product_id
+        assert item['quantity'] == 2
+
+    def test_status_and_customer_filters(self, staff_client, customers):
+        orders = make_orders(customers, 4)
+        response = staff_client.get(reverse('order-list'), {'status': 'C'})
+        assert {row['id'] for row in response.data} == {orders[1].id, orders[3].id}
+        response = staff_client.get(reverse('order-list'), {'status': 'P,C', 'customer': customers[0].id})
+        assert {row['id'] for row in response.data} == {orders[0].id, orders[2].id}
+
+    def test_created_range(self, staff_client, customers):
+        old, recent = make_orders(customers, 2)
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = staff_client.get(reverse('order-list'), {'created_after': since})
+        assert [row['id'] for row in response.data] == [recent.id]
+        response = staff_client.get(reverse('order-list'), {'created_before': since})
+        assert [row['id'] for row in response.data] == [old.id]
+
+    def test_customers_only_see_their_own_orders(self, api_client, customers):
+        orders = make_orders(customers, 2)
+        api_client.force_authenticate(user=customers[0].user)
+        response = api_client.get(reverse('order-list'), {'customer': customers[1].id})
+        assert response.data == []
+        response = api_client.get(reverse('order-list'))
+        assert [row['id'] for row in response.data] == [orders[0].id]
+
+    @pytest.mark.parametrize('params', [
+        {'status': 'Z'}, {'customer': 'me'}, {'created_after': 'last week'},
+    ])
+    def test_invalid_filters(self, staff_client, params):
+        assert staff_client.get(reverse('order-list'), params).status_code == 400
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Category, Order, Product
+
+
+@pytest.fixture
+def products():
+    return [
+        Product.objects.create(name=f'Product {i}', description='', price='1.00', stock=1)
+        for i in range(7)
+    ]
+
+def walk(client, url, params):
+    """Follow ``next`` links and return every page."""
+    pages = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        pages.append(response.data)
+        if not response.data['next']:
+            return pages
+        response = client.get(response.data['next'])
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_unpaginated_by_default(self, api_client, products):
+        response = api_client.get(reverse('product-list'))
+        assert isinstance(response.data, list)
+        assert len(response.data) == 7
+
+    def test_pages_cover_every_row_once_newest_first(self, api_client, products):
+        pages = walk(api_client, reverse('product-list'), {'page_size': 3})
+        assert [len(page['results']) for page in pages] == [3, 3, 1]
+        ids = [row['id'] for page in pages for row in page['results']]
+        assert ids == sorted((p.id for p in products), reverse=True)
+
+    def test_ties_on_created_at_are_broken_by_id(self, api_client, products):
+        Product.objects.update(created_at=products[0].created_at)
+        pages = walk(api_client, reverse('product-list'), {'page_size': 2})
+        ids = [row['id'] for page in pages for row in page['results']]
+        assert ids == sorted((p.id for p in products), reverse=True)
+
+    def test_page_size_is_capped(self, api_client, products, settings):
+        settings.PRODUCTS_MAX_PAGE_SIZE = 4
+        response = api_client.get(reverse('product-list'), {'page_size': 1000})
+        assert len(response.data['results']) == 4
+
+    def test_deep_page_costs_the_same_as_first(self, api_client, products):
+        first = api_client.get(reverse('product-list'), {'page_size': 2})
+        with CaptureQueriesContext(connection) as ctx:
+            api_client.get(first.data['next'])
+        assert 'OFFSET' not in ctx.captured_queries[0]['sql'].upper()
+
+    def test_invalid_cursor_is_404(self, api_client, products):
+        response = api_client.get(reverse('product-list'), {'cursor': 'not-a-cursor'})
+        assert response.status_code == 404
+
+    def test_categories_paginate_in_tree_order(self, api_client):
+        root = Category.objects.create(name='Root')
+        Category.objects.create(name='B', parent=root)
+        Category.objects.create(name='A', parent=root)
+        pages = walk(api_client, reverse('category-list'), {'page_size': 2})
+        assert [row['name'] for page in pages for row in page['results']] == ['Root', 'A', 'B']
+
+    def test_orders_paginate(self, customer_client, customer):
+        for _ in range(3):
+            Order.objects.create(customer=customer, shipping_address='Nairobi')
+        pages = walk(customer_client, reverse('order-list'), {'page_size': 2})
+        assert sum(len(page['results']) for page in pages) == 3
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Category, Product
+from products.tree import get_descendant_ids
+
+
+@pytest.fixture
+def catalogue():
+    electronics = Category.objects.create(name='Electronics')
+    phones = Category.objects.create(name='Phones', parent=electronics)
+    android = Category.objects.create(name='Android', parent=phones)
+    books = Category.objects.create(name='Books')
+
+    def make(name, *categories, **kwargs):
+        product = Product.objects.create(
+            name=name, description=f'{name} description', price='10.00', stock=5, **kwargs
+        )
+        product.categories.set(categories)
+        return product
+
+    return {
+        'electronics': electronics,
+        'phones': phones,
+        'android': android,
+        'books': books,
+        'tv': make('TV', electronics),
+        'pixel': make('Pixel', phones, android),
+        'galaxy': make('Galaxy', android),
+        'novel': make('Novel', books),
+        'hidden': make('Hidden', android, available=False),
+    }
+
+def names(response):
+    return sorted(product['name'] for product in response.data)
+
+@pytest.mark.django_db
+class TestDescendantCategoryFilter:
+    def test_direct_category_filter_is_unchanged(self, api_client, catalogue):
+        response = api_client.get(
+            reverse('product-list'), {'category': catalogue['electronics'].id}
+        )
+        assert names(response) == ['TV']
+
+    def test_include_descendants_walks_subtree(self, api_client, catalogue):
+        response = api_client.get(
+            reverse('product-list'),
+            {'category': catalogue['electronics'].id, 'include_descendants': '1'},
+        )
+        # Pixel sits in two categories of the subtree but is listed once.
+        assert names(response) == ['Galaxy', 'Pixel', 'TV']
+
+    def test_include_descendants_on_leaf(self, api_client, catalogue):
+        response = api_client.get(
+            reverse('product-list'),
+            {'category': catalogue['android'].id, 'include_descendants': '1'},
+        )
+        assert names(response) == ['Galaxy', 'Pixel']
+
+    def test_unknown_category_returns_nothing(self, api_client, catalogue):
+        response = api_client.get(
+            reverse('product-list'), {'category': 999999, 'include_descendants': '1'}
+        )
+        assert response.status_code == 200
+        assert response.data == []
+
+    def test_invalid_category_is_rejected(self, api_client, catalogue):
+        response = api_client.get(reverse('product-list'), {'category': 'abc'})
+        assert response.status_code == 400
+
+    def test_filter_is_a_single_product_query(self, authenticated_client, catalogue):
+        params = {'category': catalogue['electronics'].id, 'include_descendants': '1'}
+        authenticated_client.get(reverse('product-list'), params)
+        with CaptureQueriesContext(connection) as ctx:
+            authenticated_client.get(reverse('product-list'), params)
+        # Validator aggregate, the product query and the category prefetch;
+        # the subtree itself is resolved without extra queries.
+        assert len(ctx.captured_queries) == 3
+        assert sum('DISTINCT' in q['sql'] for q in ctx.captured_queries) >= 1
+
+    def test_descendant_ids_follow_tree_changes(self, catalogue):
+        assert get_descendant_ids(catalogue['phones'].id) == {
+            catalogue['phones'].id, catalogue['android'].id
+        }
+        Category.objects.create(name='iOS', parent=catalogue['phones'])
+        assert len(get_descendant_ids(catalogue['phones'].id)) == 3
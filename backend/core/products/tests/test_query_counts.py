@@ -0,0 +1,70 @@
+import pytest
+from django.urls import reverse
+
+from products.models import Cart, CartItem, Category, Order, OrderItem, Product
+
+
+@pytest.fixture
+def categories():
+    root = Category.objects.create(name='Root')
+    return [root, Category.objects.create(name='Leaf', parent=root)]
+
+@pytest.fixture
+def make_products(categories):
+    def make(count):
+        products = []
+        for i in range(count):
+            product = Product.objects.create(
+                name=f'Product {i}', description='', price='5.00', stock=10
+            )
+            product.categories.set(categories)
+            products.append(product)
+        return products
+    return make
+
+@pytest.mark.django_db
+class TestQueryCountsDoNotGrow:
+    def test_product_list(self, api_client, make_products, count_queries):
+        make_products(2)
+        small = count_queries(api_client, reverse('product-list'))
+        make_products(8)
+        assert count_queries(api_client, reverse('product-list')) == small
+
+    def test_product_list_categories_are_serialized(self, api_client, make_products, categories):
+        make_products(1)
+        response = api_client.get(reverse('product-list'))
+        assert response.data[0]['categories'] == [c.id for c in categories]
+
+    def test_product_detail(self, api_client, make_products, count_queries):
+        product = make_products(1)[0]
+        assert count_queries(api_client, reverse('product-detail', args=[product.id])) == 3
+
+    def test_order_list(self, customer_client, make_products, customer, count_queries):
+        def add_order(products):
+            order = Order.objects.create(customer=customer, shipping_address='Nairobi')
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+
+        add_order(make_products(1))
+        small = count_queries(customer_client, reverse('order-list'))
+        add_order(make_products(5))
+        add_order(make_products(3))
+        assert count_queries(customer_client, reverse('order-list')) == small
+
+    def test_order_detail_items_prefetched(self, customer_client, make_products, customer, count_queries):
+        order = Order.objects.create(customer=customer, shipping_address='Nairobi')
+        for product in make_products(1):
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        small = count_queries(customer_client, reverse('order-detail', args=[order.id]))
+        for product in make_products(5):
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        assert count_queries(customer_client, reverse('order-detail', args=[order.id])) == small
+
+    def test_cart(self, customer_client, make_products, customer, count_queries):
+        cart = Cart.objects.create(customer=customer)
+        for product in make_products(1):
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        small = count_queries(customer_client, reverse('cart-detail'))
+        for product in make_products(6):
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        assert count_queries(customer_client, reverse('cart-detail')) == small
@@ -0,0 +1,143 @@
+"""
+Query plan regression tests.
+
+Every SELECT a hot view sends is run through EXPLAIN against a seeded
+dataset, and the test fails if the plan reads a large table with a
+sequential scan. On PostgreSQL sequential scans are disabled for the
+check, so one only shows up when no index can serve the query.
+"""
+
+import re
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Cart, CartItem, Category, Order, OrderItem, Product
+from myuser.models import Customer
+
+User = get_user_model()
+
+# Tables that are read in full on purpose, e.g. the cached category tree.
+SMALL_TABLES = {Category._meta.db_table}
+
+
+def explain(sql, params=None):
+    """Return the plan lines of a query."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+def sequential_scans(lines):
+    """Return the tables a plan reads with a full sequential scan."""
+    if connection.vendor == 'postgresql':
+        pattern = re.compile(r'Seq Scan on (\w+)')
+    else:
+        # SQLite: "SCAN table" is a full scan; "SCAN table USING INDEX"
+        # walks an index in order and "SEARCH" is an index lookup.
+        pattern = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*USING)')
+    tables = set()
+    derived = set()
+    for line in lines:
+        line = line.strip()
+        # Scanning a subquery SQLite built itself is not a table scan.
+        derived.update(re.findall(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)', line))
+        match = pattern.search(line)
+        if match:
+            tables.add(match.group(1))
+    return tables - derived - SMALL_TABLES
+
+def assert_no_sequential_scans(client, url, params=None):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, params or {})
+    assert response.status_code == 200
+    selects = [
+        q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')
+    ]
+    assert selects
+    for sql in selects:
+        plan = explain(sql)
+        assert not sequential_scans(plan), f"Sequential scan in:\n{sql}\n" + '\n'.join(plan)
+
+@pytest.fixture
+def seeded(django_user_model):
+    root = Category.objects.create(name='Electronics')
+    phones = Category.objects.create(name='Phones', parent=root)
+    products = Product.objects.bulk_create(
+        Product(name=f'Product {i}', description='', price='9.99', stock=5, available=i % 4 != 0)
+        for i in range(400)
+    )
+    Product.categories.through.objects.bulk_create(
+        Product.categories.through(product_id=product.pk, category_id=phones.pk)
+        for product in products[::2]
+    )
+    users = [
+        django_user_model.objects.create_user(username=f'user{i}', password='pass12345')
+        for i in range(5)
+    ]
+    customers = [Customer.objects.create(user=user) for user in users]
+    orders = Order.objects.bulk_create(
+        Order(customer=customers[i % 5], shipping_address='Nairobi', status='PCSDX'[i % 5])
+        for i in range(200)
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product=products[i], quantity=1, price='9.99')
+        for i, order in enumerate(orders)
+    )
+    cart = Cart.objects.create(customer=customers[0])
+    CartItem.objects.bulk_create(CartItem(cart=cart, product=product) for product in products[:10])
+    staff = django_user_model.objects.create_user(username='staff', password='pass12345', is_staff=True)
+    return {'user': users[0], 'staff': staff, 'root': root, 'phones': phones, 'product': products[1]}
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    def test_product_list(self, authenticated_client, seeded):
+        url = reverse('product-list')
+        assert_no_sequential_scans(authenticated_client, url, {'page_size': 20})
+        first = authenticated_client.get(url, {'page_size': 20})
+        assert_no_sequential_scans(authenticated_client, first.data['next'])
+
+    def test_product_list_by_category(self, authenticated_client, seeded):
+        url = reverse('product-list')
+        assert_no_sequential_scans(authenticated_client, url, {
+            'category': seeded['phones'].id, 'page_size': 20,
+        })
+        assert_no_sequential_scans(authenticated_client, url, {
+            'category': seeded['root'].id, 'include_descendants': 1, 'page_size': 20,
+        })
+
+    def test_product_detail(self, authenticated_client, seeded):
+        url = reverse('product-detail', args=[seeded['product'].id])
+        assert_no_sequential_scans(authenticated_client, url)
+
+    def test_customer_orders(self, api_client, seeded):
+        api_client.force_authenticate(user=seeded['user'])
+        assert_no_sequential_scans(api_client, reverse('order-list'), {'page_size': 20})
+
+    def test_customer_orders_with_archive(self, api_client, seeded):
+        api_client.force_authenticate(user=seeded['user'])
+        assert_no_sequential_scans(api_client, reverse('order-list'), {
+            'page_size': 20, 'include_archived': 1,
+        })
+
+    def test_staff_orders(self, api_client, seeded):
+        api_client.force_authenticate(user=seeded['staff'])
+        assert_no_sequential_scans(api_client, reverse('order-list'), {'page_size': 20})
+
+    def test_orders_by_status(self, seeded):
+        query = Order.objects.filter(status='S').values('id').query
+        assert not sequential_scans(explain(*query.sql_with_params()))
+
+    def test_cart(self, api_client, seeded):
+        api_client.force_authenticate(user=seeded['user'])
+        assert_no_sequential_scans(api_client, reverse('cart-detail'))
+
+    def test_detects_sequential_scans(self, seeded):
+        query = Product.objects.filter(description='x').values('id').query
+        assert sequential_scans(explain(*query.sql_with_params())) == {Product._meta.db_table}
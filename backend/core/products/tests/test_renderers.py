@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from products.models import Order
+from products.renderers import FastJSONRenderer, StreamingJSONRenderer
+from myuser.models import Customer
+
+User = get_user_model()
+
+PAYLOAD = {
+    'price': Decimal('10.50'),
+    'created_at': datetime(2025, 1, 1, 8, 30, 15, 123456, tzinfo=timezone.utc),
+    'name': 'Line separator',
+    'nested': [{'count': 3, 'ok': True, 'none': None}],
+    1: 'int key',
+}
+
+
+class TestFastJSONRenderer:
+    def test_matches_stock_renderer(self):
+        assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_none_renders_empty_body(self):
+        assert FastJSONRenderer().render(None) == b''
+
+    def test_indent_falls_back_to_stock_renderer(self):
+        media_type = 'application/json; indent=2'
+        expected = JSONRenderer().render(PAYLOAD, media_type)
+        assert FastJSONRenderer().render(PAYLOAD, media_type) == expected
+
+    def test_stream_joins_chunks_into_one_array(self):
+        chunks = [[{'id': 1}, {'id': 2}], [], [{'id': 3}]]
+        body = b''.join(StreamingJSONRenderer().stream(chunks))
+        assert json.loads(body) == [{'id': 1}, {'id': 2}, {'id': 3}]
+        assert b''.join(StreamingJSONRenderer().stream([])) == b'[]'
+
+
+@pytest.mark.django_db
+class TestOrderStream:
+    def test_streams_every_order(self, api_client, settings):
+        settings.PRODUCTS_STREAM_CHUNK_SIZE = 2
+        user = User.objects.create_user(username='staff', password='pass12345', is_staff=True)
+        customer = Customer.objects.create(user=user)
+        for _ in range(5):
+            Order.objects.create(customer=customer, shipping_address='Nairobi')
+        api_client.force_authenticate(user=user)
+
+        streamed = api_client.get(reverse('order-list'), {'stream': 1})
+        assert streamed.streaming
+        assert streamed['Content-Type'] == 'application/json'
+        body = json.loads(b''.join(streamed.streaming_content))
+
+        listed = api_client.get(reverse('order-list'), {'page_size': 10})
+        assert body == json.loads(json.dumps(listed.data['results']))
@@ -0,0 +1,109 @@
+import pytest
+from django.urls import reverse
+
+from products.models import Category, Product
+
+
+@pytest.fixture
+def product():
+    product = Product.objects.create(name='Lamp', description='Desk lamp', price='12.00', stock=2)
+    product.categories.add(Category.objects.create(name='Lighting'))
+    return product
+
+@pytest.mark.django_db
+class TestAnonymousResponseCache:
+    @pytest.mark.parametrize('url_name', ['product-list', 'category-list'])
+    def test_second_list_read_hits_cache(self, api_client, product, url_name, count_queries):
+        first = api_client.get(reverse(url_name))
+        assert count_queries(api_client, reverse(url_name)) == 0
+        second = api_client.get(reverse(url_name))
+        assert second.data == first.data
+        assert second['ETag'] == first['ETag']
+
+    def test_detail_reads_hit_cache(self, api_client, product, count_queries):
+        category = product.categories.get()
+        for url in (
+            reverse('product-detail', args=[product.id]),
+            reverse('category-detail', args=[category.id]),
+        ):
+            api_client.get(url)
+            assert count_queries(api_client, url) == 0
+
+    def test_conditional_request_answered_from_cache(self, api_client, product, count_queries):
+        url = reverse('product-detail', args=[product.id])
+        etag = api_client.get(url)['ETag']
+        assert count_queries(api_client, url, status=304, HTTP_IF_NONE_MATCH=etag) == 0
+
+    def test_query_string_is_part_of_key(self, api_client, product):
+        api_client.get(reverse('product-list'))
+        response = api_client.get(reverse('product-list'), {'category': 999})
+        assert response.data == []
+
+    def test_product_save_invalidates(self, api_client, product):
+        api_client.get(reverse('product-detail', args=[product.id]))
+        product.name = 'Floor Lamp'
+        product.save()
+        response = api_client.get(reverse('product-detail', args=[product.id]))
+        assert response.data['name'] == 'Floor Lamp'
+
+    def test_product_delete_invalidates(self, api_client, product):
+        api_client.get(reverse('product-list'))
+        product.delete()
+        assert api_client.get(reverse('product-list')).data == []
+
+    def test_category_assignment_invalidates(self, api_client, product):
+        api_client.get(reverse('product-list'))
+        extra = Category.objects.create(name='Sale')
+        product.categories.add(extra)
+        response = api_client.get(reverse('product-list'))
+        assert extra.id in response.data[0]['categories']
+
+    def test_category_delete_invalidates_products(self, api_client, product):
+        category = product.categories.get()
+        api_client.get(reverse('product-list'))
+        api_client.get(reverse('product-detail', args=[product.id]))
+        category.delete()
+        assert api_client.get(reverse('product-list')).data[0]['categories'] == []
+        response = api_client.get(reverse('product-detail', args=[product.id]))
+        assert response.data['categories'] == []
+
+    def test_category_change_invalidates_category_list(self, api_client, product):
+        api_client.get(reverse('category-list'))
+        Category.objects.create(name='Garden')
+        names = [c['name'] for c in api_client.get(reverse('category-list')).data]
+        assert 'Garden' in names
+
+    def test_writer_never_reads_stale_data(
+        self, api_client, authenticated_client, product, count_queries
+    ):
+        api_client.get(reverse('product-detail', args=[product.id]))
+        assert count_queries(api_client, reverse('product-detail', args=[product.id])) == 0
+        response = authenticated_client.put(
+            reverse('product-detail', args=[product.id]),
+            {'name': 'Smart Lamp', 'description': 'Desk lamp', 'price': '15.00', 'stock': 2},
+            format='json',
+        )
+        assert response.status_code == 200
+        read_back = authenticated_client.get(reverse('product-detail', args=[product.id]))
+        assert read_back.data['name'] == 'Smart Lamp'
+        anonymous = api_client.get(reverse('product-detail', args=[product.id]))
+        assert anonymous.data['name'] == 'Smart Lamp'
+
+    def test_authenticated_reads_bypass_cache(self, authenticated_client, product, count_queries):
+        authenticated_client.get(reverse('product-list'))
+        assert count_queries(authenticated_client, reverse('product-list')) > 0
+
+    def test_works_with_file_based_cache(
+        self, api_client, product, settings, tmp_path, count_queries
+    ):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+        first = api_client.get(reverse('product-list'))
+        assert count_queries(api_client, reverse('product-list')) == 0
+        assert list(tmp_path.iterdir())
+        Product.objects.create(name='Bulb', description='', price='2.00', stock=9)
+        assert len(api_client.get(reverse('product-list')).data) == len(first.data) + 1
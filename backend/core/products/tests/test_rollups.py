@@ -0,0 +1,147 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import DailySales, Order, OrderItem, Product, ProductSales
+from myuser.models import Customer
+
+User = get_user_model()
+
+
+@pytest.fixture
+def staff_customer(staff_client):
+    return Customer.objects.create(user=User.objects.get(username='staff'), phone='')
+
+@pytest.fixture
+def products():
+    return [
+        Product.objects.create(name=f'Product {i}', description='', price=f'{i + 1}.00', stock=100)
+        for i in range(3)
+    ]
+
+def place_order(client, customer, lines):
+    response = client.post(reverse('order-list'), {
+        'customer': customer.id, 'shipping_address': 'Nairobi',
+        'items': [{'product': product.id, 'quantity': quantity} for product, quantity in lines],
+    }, format='json')
+    assert response.status_code == 201
+    return Order.objects.get(pk=response.data['id'])
+
+def set_status(client, order, code):
+    response = client.put(reverse('order-detail', args=[order.id]), {
+        'customer': order.customer_id, 'shipping_address': order.shipping_address, 'status': code,
+    }, format='json')
+    assert response.status_code == 200
+
+def daily():
+    return {row.status: (row.orders, row.revenue) for row in DailySales.objects.filter(orders__gt=0)}
+
+def product_sales():
+    return {row.product_id: (row.units, row.revenue) for row in ProductSales.objects.filter(units__gt=0)}
+
+def snapshot():
+    return (
+        sorted(DailySales.objects.filter(orders__gt=0).values_list('day', 'status', 'orders', 'revenue')),
+        sorted(ProductSales.objects.filter(units__gt=0).values_list('product', 'units', 'revenue')),
+    )
+
+@pytest.mark.django_db
+class TestIncrementalRollups:
+    def test_order_creation(self, staff_client, staff_customer, products):
+        place_order(staff_client, staff_customer, [(products[0], 2), (products[1], 1)])
+        place_order(staff_client, staff_customer, [(products[1], 3)])
+        assert daily() == {'P': (2, Decimal('10.00'))}
+        assert product_sales() == {
+            products[0].id: (2, Decimal('2.00')), products[1].id: (4, Decimal('8.00')),
+        }
+
+    def test_status_changes(self, staff_client, staff_customer, products):
+        order = place_order(staff_client, staff_customer, [(products[2], 1)])
+        set_status(staff_client, order, 'S')
+        assert daily() == {'S': (1, Decimal('3.00'))}
+        set_status(staff_client, order, 'X')
+        assert daily() == {'X': (1, Decimal('3.00'))}
+        assert product_sales() == {}
+        set_status(staff_client, order, 'C')
+        assert product_sales() == {products[2].id: (1, Decimal('3.00'))}
+
+    def test_deletion(self, staff_client, staff_customer, products):
+        keep = place_order(staff_client, staff_customer, [(products[0], 1)])
+        gone = place_order(staff_client, staff_customer, [(products[0], 1), (products[1], 1)])
+        assert staff_client.delete(reverse('order-detail', args=[gone.id])).status_code == 204
+        assert daily() == {'P': (1, Decimal('1.00'))}
+        assert product_sales() == {products[0].id: (1, Decimal('1.00'))}
+        assert keep.items.exists()
+
+    def test_rebuild_matches_incremental_updates(self, staff_client, staff_customer, products):
+        orders = [place_order(staff_client, staff_customer, [(products[i % 3], i + 1)]) for i in range(6)]
+        set_status(staff_client, orders[0], 'X')
+        set_status(staff_client, orders[1], 'D')
+        staff_client.delete(reverse('order-detail', args=[orders[2].id]))
+        incremental = snapshot()
+        DailySales.objects.all().delete()
+        ProductSales.objects.all().delete()
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        assert snapshot() == incremental
+
+    def test_rebuild_backfills_days(self, staff_customer, products):
+        today = timezone.now()
+        for days_ago in (0, 2, 2):
+            order = Order.objects.create(customer=staff_customer, shipping_address='Nairobi', total='4.00')
+            OrderItem.objects.create(order=order, product=products[0], quantity=2, price='4.00')
+            Order.objects.filter(pk=order.pk).update(created_at=today - timedelta(days=days_ago))
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        assert sorted(DailySales.objects.values_list('day', 'orders')) == [
+            (timezone.localdate(today - timedelta(days=2)), 2), (timezone.localdate(today), 1),
+        ]
+        assert product_sales() == {products[0].id: (6, Decimal('12.00'))}
+
+@pytest.mark.django_db
+class TestSalesAnalytics:
+    url = reverse('sales-analytics')
+
+    def test_summary(self, staff_client, staff_customer, products):
+        place_order(staff_client, staff_customer, [(products[0], 1), (products[2], 2)])
+        cancelled = place_order(staff_client, staff_customer, [(products[1], 5)])
+        set_status(staff_client, cancelled, 'X')
+        response = staff_client.get(self.url, {'top': 1})
+        assert response.status_code == 200
+        assert response.data['revenue_by_day'] == [
+            {'day': timezone.localdate(), 'orders': 1, 'revenue': '7.00'},
+        ]
+        assert response.data['orders_by_status'] == {'P': 1, 'C': 0, 'S': 0, 'D': 0, 'X': 1}
+        assert response.data['totals'] == {'orders': 1, 'revenue': '7.00'}
+        assert response.data['top_products'] == [
+            {'product': products[2].id, 'name': 'Product 2', 'units': 2, 'revenue': '6.00'},
+        ]
+
+    def test_date_range(self, staff_client, staff_customer, products):
+        place_order(staff_client, staff_customer, [(products[0], 1)])
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        response = staff_client.get(self.url, {'start': tomorrow.isoformat()})
+        assert response.data['revenue_by_day'] == []
+        assert staff_client.get(self.url, {'start': 'yesterday'}).status_code == 400
+
+    def test_reads_only_rollups(self, staff_client, staff_customer, products):
+        def count():
+            with CaptureQueriesContext(connection) as ctx:
+                assert staff_client.get(self.url).status_code == 200
+            return ctx.captured_queries
+        place_order(staff_client, staff_customer, [(products[0], 1)])
+        queries = count()
+        for i in range(5):
+            place_order(staff_client, staff_customer, [(products[i % 3], 1)])
+        assert len(count()) == len(queries)
+        order_tables = (Order._meta.db_table, OrderItem._meta.db_table)
+        assert not any(f'"{table}"' in q['sql'] for q in queries for table in order_tables)
+
+    def test_staff_only(self, customer_client, products):
+        assert customer_client.get(self.url).status_code == 403
@@ -0,0 +1,69 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from products.models import Category, Order, OrderItem, Product
+from products.rows import OrderRows, ProductRows
+from products.serializers import OrderSerializer, ProductSerializer
+
+
+@pytest.fixture
+def catalogue():
+    phones = Category.objects.create(name='Phones')
+    audio = Category.objects.create(name='Audio')
+    products = [
+        Product.objects.create(name='Phone', description='Smart', price='10.50', stock=2),
+        Product.objects.create(name='Radio', description='', price='3.00', stock=0, available=False),
+        Product.objects.create(name='Cable', description='USB', price='0.99', stock=9),
+    ]
+    products[0].categories.add(phones, audio)
+    products[1].categories.add(audio)
+    Product.objects.filter(pk=products[0].pk).update(
+        image='products/phone.jpg',
+        image_variants={'source': 'products/phone.jpg', 'sizes': [
+            {'name': 'thumbnail', 'width': 150, 'height': 100, 'webp': 'a.webp', 'jpeg': 'a.jpg'},
+            {'name': 'card', 'width': 400, 'height': 267, 'webp': 'b.webp', 'jpeg': 'b.jpg'},
+        ]},
+    )
+    return products
+
+@pytest.fixture
+def orders(catalogue, customer):
+    first = Order.objects.create(customer=customer, shipping_address='Nairobi', total='24.00')
+    OrderItem.objects.create(order=first, product=catalogue[0], quantity=2, price='21.00')
+    OrderItem.objects.create(order=first, product=catalogue[2], quantity=3, price='2.97')
+    Order.objects.create(customer=customer, shipping_address='Mombasa', status='C')
+    return Order.objects.all()
+
+def render(data):
+    return JSONRenderer().render(data)
+
+@pytest.mark.django_db
+class TestFastRows:
+    def test_products_match_serializer(self, catalogue):
+        request = APIRequestFactory().get('/')
+        context = {'request': request}
+        queryset = Product.objects.for_listing().order_by('id')
+        expected = ProductSerializer(queryset, many=True, context=context).data
+        rows = ProductRows(context=context)
+        assert render(rows.render(rows.values(queryset))) == render(expected)
+
+    def test_sparse_products_match_serializer(self, catalogue):
+        fields = ['id', 'price', 'categories']
+        queryset = Product.objects.for_listing().order_by('id')
+        expected = ProductSerializer(queryset, many=True, fields=fields).data
+        rows = ProductRows(fields=fields)
+        assert render(rows.render(rows.values(queryset))) == render(expected)
+
+    def test_orders_match_serializer(self, orders):
+        queryset = orders.for_listing().order_by('id')
+        expected = OrderSerializer(queryset, many=True).data
+        rows = OrderRows()
+        assert render(rows.render(rows.values(queryset))) == render(expected)
+
+    def test_benchmark_command(self, catalogue):
+        call_command('benchmark_serializers', sizes=[5], repeat=1, stdout=StringIO())
+        assert Product.objects.count() == 3
@@ -0,0 +1,70 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from products.models import Category, Product
+
+
+@pytest.fixture
+def searchable():
+    phones = Category.objects.create(name='Phones')
+    items = {
+        'phone': Product.objects.create(
+            name='Android Phone', description='A fast smartphone', price='300.00', stock=3
+        ),
+        'case': Product.objects.create(
+            name='Leather Case', description='Fits any android phone', price='20.00', stock=3
+        ),
+        'kettle': Product.objects.create(
+            name='Kettle', description='Boils water', price='35.00', stock=3
+        ),
+        'hidden': Product.objects.create(
+            name='Old Android Phone', description='Discontinued', price='99.00',
+            stock=0, available=False
+        ),
+    }
+    items['phone'].categories.add(phones)
+    return items
+
+def result_names(response):
+    return [product['name'] for product in response.data]
+
+@pytest.mark.django_db
+class TestProductSearch:
+    def test_requires_query(self, api_client, searchable):
+        response = api_client.get(reverse('product-search'))
+        assert response.status_code == 400
+
+    def test_name_matches_rank_above_description_matches(self, api_client, searchable):
+        response = api_client.get(reverse('product-search'), {'q': 'android phone'})
+        assert response.status_code == 200
+        assert result_names(response) == ['Android Phone', 'Leather Case']
+
+    def test_only_available_products_are_returned(self, api_client, searchable):
+        response = api_client.get(reverse('product-search'), {'q': 'discontinued'})
+        assert response.data == []
+
+    def test_no_match(self, api_client, searchable):
+        response = api_client.get(reverse('product-search'), {'q': 'bicycle'})
+        assert response.data == []
+
+    def test_results_are_limited(self, api_client, searchable):
+        response = api_client.get(reverse('product-search'), {'q': 'phone', 'page_size': 1})
+        assert result_names(response) == ['Android Phone']
+
+    def test_category_filter_applies(self, api_client, searchable):
+        phones = Category.objects.get(name='Phones')
+        response = api_client.get(
+            reverse('product-search'), {'q': 'phone', 'category': phones.id}
+        )
+        assert result_names(response) == ['Android Phone']
+
+    def test_search_reflects_updates(self, api_client, searchable):
+        kettle = searchable['kettle']
+        kettle.name = 'Electric Kettle'
+        kettle.save()
+        response = api_client.get(reverse('product-search'), {'q': 'electric'})
+        assert result_names(response) == ['Electric Kettle']
+
+    def test_backfill_command_runs(self, searchable):
+        call_command('update_search_vectors', batch_size=2)
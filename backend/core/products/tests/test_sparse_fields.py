@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from products.models import Category, Order, OrderItem, Product
+
+
+@pytest.fixture
+def product():
+    category = Category.objects.create(name='Phones')
+    product = Product.objects.create(
+        name='Phone', description='A very long description', price='10.00', stock=3
+    )
+    product.categories.add(category)
+    return product
+
+@pytest.fixture
+def buyer(customer, product):
+    order = Order.objects.create(customer=customer, shipping_address='Nairobi', total='10.00')
+    OrderItem.objects.create(order=order, product=product, quantity=1, price='10.00')
+    return order
+
+@pytest.mark.django_db
+class TestSparseFields:
+    def test_fields_limits_product_list(self, authenticated_client, product):
+        response = authenticated_client.get(reverse('product-list'), {'fields': 'id,name,price'})
+        assert response.status_code == 200
+        assert response.data == [{'id': product.id, 'name': 'Phone', 'price': '10.00'}]
+
+    def test_omit_drops_product_fields(self, authenticated_client, product):
+        response = authenticated_client.get(
+            reverse('product-detail', args=[product.id]), {'omit': 'description,categories'}
+        )
+        assert response.status_code == 200
+        assert 'description' not in response.data
+        assert 'categories' not in response.data
+        assert response.data['name'] == 'Phone'
+
+    def test_unknown_field_is_rejected(self, api_client, product):
+        response = api_client.get(reverse('product-list'), {'fields': 'id,secret'})
+        assert response.status_code == 400
+
+    def test_unselected_columns_are_not_fetched(self, authenticated_client, product):
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(reverse('product-list'), {'fields': 'id,name'})
+        assert response.status_code == 200
+        product_queries = [q['sql'] for q in ctx.captured_queries if 'products_product' in q['sql']]
+        listing_sql = product_queries[-1]
+        assert '"description"' not in listing_sql
+        # No categories were asked for, so they are not prefetched either.
+        assert not any('products_product_categories' in sql for sql in product_queries[1:])
+
+    def test_method_fields_load_their_column(self, authenticated_client, product, count_queries):
+        def count(url, fields):
+            return count_queries(authenticated_client, url, {'fields': fields})
+
+        detail = reverse('product-detail', args=[product.id])
+        assert count(detail, 'id,image') == count(detail, 'id,name')
+        few = count(reverse('product-list'), 'id,image')
+        for i in range(5):
+            Product.objects.create(name=f'Lamp {i}', description='', price='1.00', stock=1)
+        assert count(reverse('product-list'), 'id,image') == few
+
+    def test_sparse_fields_work_with_pagination(self, authenticated_client, product):
+        Product.objects.create(name='Other', description='', price='1.00', stock=1)
+        response = authenticated_client.get(
+            reverse('product-list'), {'fields': 'id', 'page_size': 1}
+        )
+        assert list(response.data['results'][0]) == ['id']
+        second = authenticated_client.get(response.data['next'])
+        assert second.data['results'] == [{'id': product.id}]
+
+    def test_order_fields(self, customer_client, buyer):
+        response = customer_client.get(reverse('order-list'), {'fields': 'id,status,total'})
+        assert response.data == [{'id': buyer.id, 'status': 'P', 'total': '10.00'}]
+        detail = customer_client.get(reverse('order-detail', args=[buyer.id]), {'omit': 'items'})
+        assert detail.status_code == 200
+        assert 'items' not in detail.data
+
+    def test_order_detail_fields(self, customer_client, buyer):
+        url = reverse('order-detail', args=[buyer.id])
+        response = customer_client.get(url, {'fields': 'id,total'})
+        assert response.status_code == 200
+        assert response.data == {'id': buyer.id, 'total': '10.00'}
+        response = customer_client.get(url, {'fields': 'items'})
+        assert response.status_code == 200
+        assert list(response.data) == ['items']
@@ -0,0 +1,54 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+
+from products.checkout import take_stock
+from products.models import DailySales, Order, OrderItem, Product
+
+
+@pytest.fixture
+def product():
+    return Product.objects.create(name='Phone', description='', price='10.00', stock=3)
+
+@pytest.mark.django_db
+class TestTakeStock:
+    def test_decrements(self, product):
+        assert take_stock({product.pk: 2})
+        product.refresh_from_db()
+        assert (product.stock, product.available) == (1, True)
+
+    def test_selling_out_marks_unavailable(self, product):
+        assert take_stock({product.pk: 3})
+        product.refresh_from_db()
+        assert (product.stock, product.available) == (0, False)
+
+    def test_never_goes_below_zero(self, product):
+        other = Product.objects.create(name='Case', description='', price='1.00', stock=5)
+        assert not take_stock({product.pk: 4, other.pk: 1})
+        product.refresh_from_db()
+        assert product.stock == 3
+
+    def test_constraint_rejects_negative_stock(self, product):
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Product.objects.filter(pk=product.pk).update(stock=-1)
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_checkouts_never_oversell():
+    out = StringIO()
+    call_command(
+        'load_test_checkout', buyers=40, stock=15, workers=8, retries=200, keep=True, stdout=out
+    )
+    assert 'No overselling' in out.getvalue()
+    product = Product.objects.get()
+    sold = sum(OrderItem.objects.values_list('quantity', flat=True))
+    assert sold + product.stock == 15
+    assert Order.objects.count() == sold
+    assert product.available == (product.stock > 0)
+
+@pytest.mark.django_db(transaction=True)
+def test_cleanup_removes_orders_from_rollups():
+    call_command('load_test_checkout', buyers=6, stock=3, workers=2, retries=200, stdout=StringIO())
+    assert not Order.objects.exists()
+    assert not DailySales.objects.exclude(orders=0).exists()
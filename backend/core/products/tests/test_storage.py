@@ -0,0 +1,95 @@
+import os
+import time
+from io import StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.http import Http404
+
+from products.models import Product
+from products.views import serve_product_media
+from products.storage import IMMUTABLE_CACHE_CONTROL, get_product_media_storage
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+def make_product(name, content, filename='photo.JPG'):
+    product = Product(name=name, description='', price='1.00')
+    product.image.save(filename, ContentFile(content))
+    return product
+
+def age(path, hours):
+    old = time.time() - hours * 3600
+    os.utime(path, (old, old))
+
+@pytest.mark.django_db
+class TestContentAddressedStorage:
+    def test_identical_uploads_share_one_file(self, media):
+        first = make_product('A', b'same bytes')
+        second = make_product('B', b'same bytes', filename='other.jpg')
+        third = make_product('C', b'other bytes')
+
+        assert first.image.name == second.image.name
+        assert first.image.name != third.image.name
+        name = os.path.basename(first.image.name)
+        assert len(name) == len('0' * 64 + '.jpg') and name.endswith('.jpg')
+        assert len(os.listdir(media / 'products')) == 2
+        assert get_product_media_storage().open(first.image.name).read() == b'same bytes'
+
+    def test_identical_upload_refreshes_the_file(self, media):
+        first = make_product('A', b'same bytes')
+        age(media / first.image.name, 48)
+        make_product('B', b'same bytes')
+        assert time.time() - os.path.getmtime(media / first.image.name) < 60
+
+    def test_hashed_media_is_served_immutable(self, client, media, settings):
+        settings.DEBUG = False
+        product = make_product('A', b'image bytes')
+        response = client.get(product.image.url)
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == b'image bytes'
+        assert response['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+        assert response['Content-Type'] == 'image/jpeg'
+
+    def test_missing_hashed_media_is_404(self, client, media):
+        assert client.get('/media/products/' + '0' * 64 + '.jpg').status_code == 404
+
+    def test_legacy_names_are_served_in_development_only(self, rf, media, settings):
+        (media / 'products').mkdir()
+        (media / 'products' / 'legacy.jpg').write_bytes(b'old upload')
+        request = rf.get('/media/products/legacy.jpg')
+        settings.DEBUG = True
+        response = serve_product_media(request, 'products/legacy.jpg')
+        assert response.status_code == 200
+        assert 'Cache-Control' not in response
+        settings.DEBUG = False
+        with pytest.raises(Http404):
+            serve_product_media(request, 'products/legacy.jpg')
+
+    def test_gc_removes_only_old_unreferenced_files(self, media):
+        kept = make_product('Kept', b'kept')
+        dropped = make_product('Dropped', b'dropped')
+        variant = get_product_media_storage().save('products/variants/v.webp', ContentFile(b'variant'))
+        Product.objects.filter(pk=kept.pk).update(image_variants={'sizes': [
+            {'name': 'thumbnail', 'width': 1, 'height': 1, 'webp': variant},
+        ]})
+        dropped_path = media / dropped.image.name
+        Product.objects.filter(pk=dropped.pk).delete()
+        fresh = get_product_media_storage().save('products/fresh.jpg', ContentFile(b'fresh'))
+        for path in (media / kept.image.name, media / variant, dropped_path):
+            age(path, 48)
+
+        out = StringIO()
+        call_command('gc_product_media', '--dry-run', stdout=out)
+        assert 'Would delete 1 files' in out.getvalue()
+        assert dropped_path.exists()
+
+        call_command('gc_product_media', stdout=StringIO())
+        assert not dropped_path.exists()
+        assert (media / kept.image.name).exists()
+        assert (media / variant).exists()
+        assert (media / fresh).exists()
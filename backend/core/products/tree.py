@@ -0,0 +1,126 @@
+"""
+Category tree helpers.
+
+The whole MPTT table is loaded with one query ordered by ``tree_id`` and
+``lft``. In that order every parent comes before its children and
+siblings come in ``order_insertion_by`` order, so the nested structure
+can be linked together in a single pass without touching the database
+again.
+
+The built tree is cached under the category tree version, which the
+signal handlers in ``products.signals`` bump whenever a category is
+saved, moved or deleted. Descendant id sets derived from it are kept in
+a per-process dict that is dropped as soon as that version moves on.
+"""
+
+import hashlib
+from django.core.cache import cache
+from .cache import CACHE_TIMEOUT, CATEGORY_TREE, get_version, versioned_key
+from .models import Category
+
+_descendants = {'version': None, 'ids': {}}
+
+
+def build_category_tree():
+    """
+    Load all categories in one query and link them into a tree.
+
+    Returns ``(nodes, bounds)``. ``nodes`` is a dict of ``id -> node`` in
+    tree order where every node has the same shape as
+    ``CategorySerializer`` output, with ``children`` holding the child
+    nodes themselves. ``bounds`` maps each id to its MPTT
+    ``(tree_id, lft, rght)`` range.
+    """
+    nodes = {}
+    bounds = {}
+    rows = Category.objects.order_by('tree_id', 'lft').values_list(
+        'id', 'name', 'parent_id', 'tree_id', 'lft', 'rght'
+    )
+    for pk, name, parent_id, tree_id, lft, rght in rows:
+        node = {'id': pk, 'name': name, 'parent': parent_id, 'children': []}
+        nodes[pk] = node
+        bounds[pk] = (tree_id, lft, rght)
+        parent = nodes.get(parent_id)
+        if parent is not None:
+            parent['children'].append(node)
+    return nodes, bounds
+
+
+def _get_cached_tree():
+    key = versioned_key(CATEGORY_TREE, 'tree')
+    tree = cache.get(key)
+    if tree is None:
+        nodes, bounds = build_category_tree()
+        rows = [(node['id'], node['name'], node['parent']) for node in nodes.values()]
+        digest = hashlib.md5(repr(rows).encode('utf-8')).hexdigest()
+        tree = (nodes, bounds, digest)
+        cache.set(key, tree, CACHE_TIMEOUT)
+    return tree
+
+
+def get_category_tree():
+    """
+    Return the cached category nodes, rebuilding them if the tree changed.
+    """
+    return _get_cached_tree()[0]
+
+
+def get_category_tree_digest():
+    """
+    Return a digest of the category tree's content, for use as a validator.
+    """
+    return _get_cached_tree()[2]
+
+
+def get_category_bounds(category_id):
+    """
+    Return the MPTT ``(tree_id, lft, rght)`` range of a category, or None.
+    """
+    return _get_cached_tree()[1].get(category_id)
+
+
+def get_descendant_ids(category_id):
+    """
+    Return the ids of a category and all of its descendants.
+
+    Unknown categories give an empty set.
+    """
+    global _descendants
+    version = get_version(CATEGORY_TREE)
+    entry = _descendants
+    if entry['version'] != version:
+        entry = _descendants = {'version': version, 'ids': {}}
+    ids = entry['ids'].get(category_id)
+    if ids is None:
+        bounds = _get_cached_tree()[1]
+        if category_id not in bounds:
+            return frozenset()
+        tree_id, lft, rght = bounds[category_id]
+        ids = frozenset(
+            pk for pk, (other_tree, other_lft, other_rght) in bounds.items()
+            if other_tree == tree_id and other_lft >= lft and other_rght <= rght
+        )
+        entry['ids'][category_id] = ids
+    return ids
+
+
+def get_root_nodes(nodes):
+    """
+    Return the top level nodes of a tree built by ``build_category_tree``.
+    """
+    return [node for node in nodes.values() if node['parent'] is None]
+
+
+def get_category_paths(separator='/'):
+    """
+    Return ``{path: id}`` for every category, where a path joins the
+    names from the root down, e.g. ``'Electronics/Phones'``.
+    """
+    paths = {}
+    names = {}
+    for node in get_category_tree().values():
+        parent_path = names.get(node['parent'])
+        path = f"{parent_path}{separator}{node['name']}" if parent_path else node['name']
+        names[node['id']] = path
+        paths[path] = node['id']
+    return paths
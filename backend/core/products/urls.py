@@ -8,12 +8,21 @@ urlpatterns = [
     
     # Products
     path('products/', views.ProductList.as_view(), name='product-list'),
+    path('products/search/', views.ProductSearch.as_view(), name='product-search'),
+    path('products/facets/', views.ProductFacets.as_view(), name='product-facets'),
+    path('products/bulk-update/', views.ProductBulkUpdate.as_view(), name='product-bulk-update'),
+    path('products/export/', views.ProductExport.as_view(), name='product-export'),
     path('products/<int:pk>/', views.ProductDetail.as_view(), name='product-detail'),
     
     # Orders
     path('orders/', views.OrderList.as_view(), name='order-list'),
+    path('orders/export/', views.OrderExport.as_view(), name='order-export'),
+    path('orders/bulk-status/', views.OrderBulkStatus.as_view(), name='order-bulk-status'),
     path('orders/<int:pk>/', views.OrderDetail.as_view(), name='order-detail'),
 
+    # Analytics
+    path('analytics/sales/', views.SalesAnalytics.as_view(), name='sales-analytics'),
+
      # Cart endpoints
     path('cart/', views.CartView.as_view(), name='cart-detail'),
     path('cart/add/', views.AddToCartView.as_view(), name='add-to-cart'),
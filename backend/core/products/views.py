@@ -19,34 +19,270 @@ from rest_framework.views import APIView
 from rest_framework import generics, exceptions
 from rest_framework import permissions, status
 from rest_framework.response import Response
+from django.core.exceptions import FieldDoesNotExist, SuspiciousFileOperation
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.core.cache import cache
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.static import serve
 from .models import *
 from .serializers import *
 from myuser.models import Customer
-from .notifications import send_order_notifications
+from .notifications import notify_orders, send_order_notifications
+from .pagination import CategoryKeysetPagination, KeysetPagination
+from .renderers import StreamingJSONRenderer
+from .rollups import (
+    record_deleted_orders, record_status_change, rollup_values, sales_summary,
+)
+from .rows import ArchivedOrderRows, MergedOrderRows, OrderRows, ProductRows
+from .search import search_products
+from .storage import IMMUTABLE_CACHE_CONTROL, get_product_media_storage, is_content_addressed
+from .tasks import run_in_background
+from .checkout import CheckoutError, checkout
+from .cache import (
+    CACHE_TIMEOUT, CATEGORY_TREE, PRODUCTS, bump_version, cache_anonymous_get,
+    query_fingerprint, versioned_key,
+)
+from .exports import FORMATS, export_lines, iter_chunks
+from .facets import FACETS, build_facets
+from .idempotency import idempotent
+from .conditional import (
+    conditional_response, make_etag, product_detail_etag, product_list_etag, set_validators,
+)
+from .tree import (
+    get_category_bounds, get_category_tree, get_category_tree_digest,
+    get_descendant_ids, get_root_nodes,
+)
+from datetime import datetime, time
 import africastalking
 from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def query_flag(request, name):
+    """
+    Helper to read a boolean query parameter such as ``?tree=1``.
+    """
+    return request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def prefetch_cart(cart):
+    """
+    Helper to load a cart's items, products and category ids in bulk so
+    CartSerializer and ``Cart.total`` do not query once per item.
+    """
+    prefetch_related_objects([cart], Prefetch('items', queryset=CartItem.objects.for_listing()))
+    return cart
+
+
+def get_datetime_param(request, name):
+    """
+    Helper to read an ISO 8601 datetime (or date) query parameter.
+
+    Returns an aware datetime, or None if the parameter is missing. A date
+    means midnight of that day in the current time zone.
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise exceptions.ValidationError({name: 'A valid ISO 8601 date or datetime is required.'})
+        parsed = datetime.combine(day, time.min)
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def filter_orders(request, queryset):
+    """
+    Helper to apply the ``status``, ``customer``, ``created_after`` and
+    ``created_before`` order filters.
+
+    ``status`` takes one or more comma separated status codes.
+    ``created_after`` is inclusive and ``created_before`` exclusive.
+    """
+    statuses = request.query_params.get('status')
+    if statuses:
+        statuses = [code.strip() for code in statuses.split(',') if code.strip()]
+        unknown = set(statuses) - {code for code, _ in Order.ORDER_STATUS}
+        if unknown:
+            raise exceptions.ValidationError({
+                'status': f"Unknown status codes: {', '.join(sorted(unknown))}."
+            })
+        queryset = queryset.filter(status__in=statuses)
+
+    customer = request.query_params.get('customer')
+    if customer:
+        try:
+            queryset = queryset.filter(customer_id=int(customer))
+        except ValueError:
+            raise exceptions.ValidationError({'customer': 'A valid customer id is required.'})
+
+    created_after = get_datetime_param(request, 'created_after')
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    created_before = get_datetime_param(request, 'created_before')
+    if created_before:
+        queryset = queryset.filter(created_at__lt=created_before)
+    return queryset
+
+
+def export_response(request, dataset):
+    """
+    Helper to stream an export in the ``output`` format (``csv`` or
+    ``ndjson``), optionally limited to rows updated at or after ``since``.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in FORMATS:
+        raise exceptions.ValidationError({'output': f"Choose one of: {', '.join(FORMATS)}."})
+    since = get_datetime_param(request, 'since')
+    response = StreamingHttpResponse(
+        export_lines(dataset, output, since=since), content_type=FORMATS[output]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{output}"'
+    return response
+
+
+def get_sparse_fields(request, serializer_class):
+    """
+    Helper to read the ``fields`` and ``omit`` query parameters.
+
+    Returns the serializer fields to render, in their declared order, or
+    None when the full representation was asked for. Unknown field names
+    are rejected with a 400.
+    """
+    requested = request.query_params.get('fields', '')
+    omitted = request.query_params.get('omit', '')
+    if not requested and not omitted:
+        return None
+
+    available = serializer_class.Meta.fields
+    selected = {name.strip() for name in requested.split(',') if name.strip()}
+    excluded = {name.strip() for name in omitted.split(',') if name.strip()}
+    unknown = (selected | excluded) - set(available)
+    if unknown:
+        raise exceptions.ValidationError({
+            'fields': f"Unknown fields: {', '.join(sorted(unknown))}."
+        })
+    return [
+        name for name in available
+        if (not selected or name in selected) and name not in excluded
+    ]
+
+
+def narrow_queryset(queryset, fields, serializer_class=None):
+    """
+    Helper to load only the columns behind the selected serializer fields.
+
+    Fields declared with a ``source`` on ``serializer_class`` load that
+    column instead; method fields load the column of their own name, if
+    there is one. The primary key and ``created_at`` are always loaded
+    because keyset cursors are built from them, and so are the foreign
+    keys that ``select_related`` follows, which cannot be deferred.
+    Prefetches are dropped when no related field was selected.
+    """
+    if fields is None:
+        return queryset
+    opts = queryset.model._meta
+    declared = getattr(serializer_class, '_declared_fields', {})
+    columns = {'pk', 'created_at'}
+    if isinstance(queryset.query.select_related, dict):
+        columns.update(queryset.query.select_related)
+    wants_relations = False
+    for name in fields:
+        source = getattr(declared.get(name), 'source', None)
+        if source in (None, '*'):
+            source = name
+        try:
+            field = opts.get_field(source)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            columns.add(source)
+        else:
+            wants_relations = True
+    queryset = queryset.only(*columns)
+    if not wants_relations:
+        queryset = queryset.prefetch_related(None)
+    return queryset
+
+
+def filter_products(request, queryset):
+    """
+    Helper to apply the ``category`` and ``include_descendants`` filters.
+
+    With ``include_descendants`` the category's MPTT range becomes a single
+    JOIN on the category table. A product filed under several categories
+    of that subtree would come back once per category, so the queryset is
+    made DISTINCT unless the category is a leaf.
+    """
+    category = request.query_params.get('category')
+    if not category:
+        return queryset
+    try:
+        category = int(category)
+    except ValueError:
+        raise exceptions.ValidationError({'category': 'A valid category id is required.'})
+
+    if not query_flag(request, 'include_descendants'):
+        return queryset.filter(categories__id=category)
+
+    descendant_ids = get_descendant_ids(category)
+    if not descendant_ids:
+        return queryset.none()
+    if len(descendant_ids) == 1:
+        return queryset.filter(categories__id=category)
+    tree_id, lft, rght = get_category_bounds(category)
+    return queryset.filter(
+        categories__tree_id=tree_id,
+        categories__lft__gte=lft,
+        categories__rght__lte=rght,
+    ).distinct()
+
+
 class CategoryList(generics.ListCreateAPIView):
     """
     API endpoint for listing and creating product categories.
 
-    - GET: List all categories (public)
+    - GET: List all categories (public). Pass ``?tree=1`` to get only the
+      root categories with their subtrees nested under ``children``.
+      Send ``page_size`` or ``cursor`` for a keyset paginated response.
     - POST: Create a new category (authenticated)
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     serializer_class = CategorySerializer
+    pagination_class = CategoryKeysetPagination
     
+    @cache_anonymous_get(CATEGORY_TREE)
     def get(self, request, *args, **kwargs):
         """
-        List all categories.
+        List all categories from the cached category tree.
         """
-        categories = Category.objects.all()
-        serializer = self.serializer_class(categories, many=True)
-        return Response(serializer.data)
+        etag = make_etag('categories', get_category_tree_digest(), query_fingerprint(request))
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        nodes = get_category_tree()
+        tree_mode = query_flag(request, 'tree')
+
+        queryset = Category.objects.only('id', 'tree_id', 'lft')
+        if tree_mode:
+            queryset = queryset.filter(parent__isnull=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            data = [nodes[category.id] for category in page if category.id in nodes]
+            return set_validators(self.get_paginated_response(data), etag)
+
+        if tree_mode:
+            return set_validators(Response(get_root_nodes(nodes)), etag)
+        return set_validators(Response(list(nodes.values())), etag)
     
     def post(self, request, *args, **kwargs):
         """
@@ -75,6 +311,7 @@ class CategoryDetail(generics.RetrieveUpdateDestroyAPIView):
         """
         return get_object_or_404(Category, pk=pk)
     
+    @cache_anonymous_get(CATEGORY_TREE)
     def get(self, request, pk, *args, **kwargs):
         """
         Retrieve a single category.
@@ -106,22 +343,36 @@ class ProductList(generics.ListCreateAPIView):
     """
     API endpoint for listing and creating products.
 
-    - GET: List all available products, optionally filter by category
+    - GET: List all available products, optionally filter by category.
+      Add ``include_descendants=1`` to include products from subcategories.
+      Send ``page_size`` or ``cursor`` for a keyset paginated response.
+      Use ``fields`` or ``omit`` (comma separated) to shrink each product.
     - POST: Create a new product (authenticated)
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     serializer_class = ProductSerializer
+    pagination_class = KeysetPagination
     
+    @cache_anonymous_get(PRODUCTS, CATEGORY_TREE)
     def get(self, request, *args, **kwargs):
         """
         List all available products, with optional category filter.
         """
-        queryset = Product.objects.filter(available=True)
-        category = request.query_params.get('category')
-        if category:
-            queryset = queryset.filter(categories__id=category)
-        serializer = self.serializer_class(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        fields = get_sparse_fields(request, self.serializer_class)
+        queryset = filter_products(request, Product.objects.for_listing().filter(available=True))
+        etag = product_list_etag(request, queryset)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        # Read-only fast path: same output as ProductSerializer, built
+        # from values rows.
+        rows = ProductRows(fields=fields, context={'request': request})
+        queryset = rows.values(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return set_validators(self.get_paginated_response(rows.render(page)), etag)
+        return set_validators(Response(rows.render(queryset)), etag)
     
     def post(self, request):
         """
@@ -133,6 +384,70 @@ class ProductList(generics.ListCreateAPIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class ProductSearch(generics.ListAPIView):
+    """
+    API endpoint for ranked full-text product search.
+
+    - GET: Search available products with ``?q=``, best matches first.
+      Accepts the same ``category`` filters as the product list and
+      ``page_size`` to limit the number of results.
+    """
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    serializer_class = ProductSerializer
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return the best matching products for the search query.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {"error": "A search query is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fields = get_sparse_fields(request, self.serializer_class)
+        queryset = filter_products(request, Product.objects.for_listing().filter(available=True))
+        limit = KeysetPagination().get_page_size(request)
+        queryset = narrow_queryset(queryset, fields, self.serializer_class)
+        results = search_products(queryset, query)[:limit]
+        serializer = self.serializer_class(
+            results, many=True, fields=fields, context={'request': request}
+        )
+        return Response(serializer.data)
+
+class ProductFacets(APIView):
+    """
+    API endpoint for catalogue facet counts.
+
+    - GET: Count available products per category (rolled up through the
+      category tree) and per price band. Accepts the same ``category``
+      filters as the product list, and ``facets=category,price`` to pick
+      which facets to compute.
+    """
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return facet counts, cached until products or categories change.
+        """
+        requested = request.query_params.get('facets')
+        facets = FACETS
+        if requested:
+            facets = tuple(name.strip() for name in requested.split(',') if name.strip())
+            unknown = sorted(set(facets) - set(FACETS))
+            if unknown:
+                raise exceptions.ValidationError(
+                    {'facets': f"Unknown facets: {', '.join(unknown)}"}
+                )
+
+        key = versioned_key((PRODUCTS, CATEGORY_TREE), 'facets', query_fingerprint(request))
+        data = cache.get(key)
+        if data is None:
+            queryset = filter_products(request, Product.objects.filter(available=True))
+            data = build_facets(queryset, get_category_tree(), facets)
+            cache.set(key, data, CACHE_TIMEOUT)
+        return Response(data)
+
 class ProductDetail(generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint for retrieving, updating, or deleting a product.
@@ -150,13 +465,24 @@ class ProductDetail(generics.RetrieveUpdateDestroyAPIView):
         """
         return get_object_or_404(Product, pk=pk)
     
+    @cache_anonymous_get(PRODUCTS)
     def get(self, request, pk, *args, **kwargs):
         """
         Retrieve a single product.
         """
-        product = self.get_object(pk)
-        serializer = self.serializer_class(product, context={'request': request})
-        return Response(serializer.data)
+        fields = get_sparse_fields(request, self.serializer_class)
+        updated_at = Product.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            raise exceptions.NotFound()
+        etag = product_detail_etag(request, updated_at)
+        not_modified = conditional_response(request, etag, updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        queryset = narrow_queryset(Product.objects.for_listing(), fields, self.serializer_class)
+        product = get_object_or_404(queryset, pk=pk)
+        serializer = self.serializer_class(product, fields=fields, context={'request': request})
+        return set_validators(Response(serializer.data), etag, updated_at)
     
     def put(self, request, pk):
         """
@@ -177,68 +503,316 @@ class ProductDetail(generics.RetrieveUpdateDestroyAPIView):
         product.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+class ProductBulkUpdate(APIView):
+    """
+    API endpoint for bulk price and stock updates (staff only).
+
+    - POST: Apply a list of ``{id, price, stock, available}`` patches in one
+      transaction and report the outcome of every row. Invalid rows and
+      unknown ids are reported without blocking the valid ones.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        """
+        Apply the patches with a single bulk_update.
+        """
+        patches = request.data
+        if not isinstance(patches, list) or not patches:
+            return Response(
+                {"error": "A non-empty list of product patches is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = settings.PRODUCTS_BULK_UPDATE_LIMIT
+        if len(patches) > limit:
+            return Response(
+                {"error": f"At most {limit} products can be updated at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = []
+        valid = {}
+        for patch in patches:
+            serializer = ProductPatchSerializer(data=patch)
+            if not serializer.is_valid():
+                row_id = patch.get('id') if isinstance(patch, dict) else None
+                results.append({'id': row_id, 'status': 'invalid', 'errors': serializer.errors})
+                continue
+            row_id = serializer.validated_data['id']
+            if row_id in valid:
+                results.append({'id': row_id, 'status': 'invalid', 'errors': {'id': ['Duplicate id.']}})
+                continue
+            valid[row_id] = serializer.validated_data
+            results.append({'id': row_id, 'status': 'updated'})
+
+        with transaction.atomic():
+            products = Product.objects.select_for_update().only(
+                'id', *ProductPatchSerializer.PATCH_FIELDS
+            ).in_bulk(list(valid))
+            now = timezone.now()
+            changed_fields = {'updated_at'}
+            for product_id, data in valid.items():
+                product = products.get(product_id)
+                if product is None:
+                    continue
+                for name in ProductPatchSerializer.PATCH_FIELDS:
+                    if name in data:
+                        setattr(product, name, data[name])
+                        changed_fields.add(name)
+                product.updated_at = now
+            if products:
+                Product.objects.bulk_update(products.values(), sorted(changed_fields))
+                # bulk_update sends no signals; invalidate once for the batch.
+                bump_version(PRODUCTS)
+
+        for result in results:
+            if result['status'] == 'updated' and result['id'] not in products:
+                result['status'] = 'not_found'
+        updated = sum(result['status'] == 'updated' for result in results)
+        logger.info(
+            f"Bulk update of {updated} products by {request.user.username}",
+            extra={'user': request.user.username, 'updated': updated}
+        )
+        return Response({'updated': updated, 'results': results})
+
+class ProductExport(APIView):
+    """
+    API endpoint for streaming a full product dump (staff only).
+
+    - GET: Stream every product as CSV (default) or ``?output=ndjson``.
+      Pass ``since`` (ISO 8601) to export only products updated since then.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """
+        Stream the product export.
+        """
+        return export_response(request, 'products')
+
 class OrderList(generics.ListCreateAPIView):
     """
     API endpoint for listing and creating orders.
 
-    - GET: List orders for the authenticated user (or all if staff)
+    - GET: List orders for the authenticated user (or all if staff).
+      Send ``page_size`` or ``cursor`` for a keyset paginated response.
+      Use ``fields`` or ``omit`` (comma separated) to shrink each order.
+      Pass ``stream=1`` to stream every order as a single JSON array.
+      Filter with ``status`` (comma separated codes), ``customer`` and the
+      ``created_after``/``created_before`` range. ``summary=1`` lists each
+      item's product id instead of the nested product.
+      ``include_archived=1`` also lists archived orders.
     - POST: Create a new order with items
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """
         Return orders for the current user, or all if staff.
         """
         user = self.request.user
+        orders = Order.objects.for_listing()
+        if user.is_staff:
+            return orders
+        return orders.filter(customer__user=user)
+
+    def get_archived_queryset(self):
+        """
+        Return archived orders for the current user, or all if staff.
+        """
+        user = self.request.user
         if user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(customer__user=user)
+            return ArchivedOrder.objects.all()
+        return ArchivedOrder.objects.filter(customer__user=user)
     
     def get(self, request, *args, **kwargs):
         """
         List orders for the authenticated user.
         """
-        orders = self.get_queryset()
-        serializer = self.serializer_class(orders, many=True)
-        return Response(serializer.data)
+        fields = get_sparse_fields(request, self.serializer_class)
+        summary = query_flag(request, 'summary')
+        # Read-only fast path: same output as OrderSerializer, built from
+        # values rows.
+        rows = OrderRows(fields=fields, summary=summary)
+        orders = rows.values(filter_orders(request, self.get_queryset()))
+        if query_flag(request, 'include_archived'):
+            return self.list_with_archive(request, rows, fields, summary)
+        if query_flag(request, 'stream'):
+            return self.stream(rows, [orders])
+        page = self.paginate_queryset(orders)
+        if page is not None:
+            return self.get_paginated_response(rows.render(page))
+        return Response(rows.render(orders))
+
+    def list_with_archive(self, request, rows, fields, summary):
+        """
+        Helper to list live and archived orders as one listing, newest first.
+        """
+        rows = MergedOrderRows(rows, ArchivedOrderRows(fields=fields, summary=summary))
+        querysets = rows.values(
+            filter_orders(request, self.get_queryset()),
+            filter_orders(request, self.get_archived_queryset()),
+        )
+        if query_flag(request, 'stream'):
+            return self.stream(rows, querysets)
+        page = self.paginator.paginate_querysets(querysets, request, view=self)
+        if page is not None:
+            return self.get_paginated_response(rows.render(page))
+        ordering = self.pagination_class.ordering
+        return Response(rows.render(
+            self.paginator.merge([queryset.order_by(*ordering) for queryset in querysets])
+        ))
+
+    def stream(self, rows, querysets):
+        """
+        Helper to stream every order as one JSON array, newest first.
+
+        Orders are read with a database iterator and serialized one chunk
+        at a time, so memory stays flat however many orders there are.
+        """
+        chunk_size = settings.PRODUCTS_STREAM_CHUNK_SIZE
+        ordering = self.pagination_class.ordering
+        orders = self.paginator.merge([
+            queryset.order_by(*ordering).iterator(chunk_size=chunk_size) for queryset in querysets
+        ])
+        chunks = (
+            rows.render(chunk)
+            for chunk in iter_chunks(orders, chunk_size)
+        )
+        return StreamingHttpResponse(
+            StreamingJSONRenderer().stream(chunks), content_type='application/json'
+        )
     
+    @idempotent
     def post(self, request):
         """
         Create a new order and its items.
         """
-        serializer = self.serializer_class(data=request.data)
+        lines = OrderLineSerializer(data=request.data.get('items', []), many=True)
+        if not lines.is_valid():
+            return Response({'items': lines.errors}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.serializer_class(data=request.data, context={'items': lines.validated_data})
         if serializer.is_valid():
-            # Handle order items
-            items_data = request.data.get('items', [])
-            order = serializer.save()
-            total = 0
-            
-            for item_data in items_data:
-                product = get_object_or_404(Product, pk=item_data['product'])
-                quantity = item_data['quantity']
-                price = product.price * quantity
-                total += price
-                
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=quantity,
-                    price=price
-                )
-            
-            order.total = total
-            order.save()
-            
+            serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class OrderExport(APIView):
+    """
+    API endpoint for streaming a full order dump, one line per item (staff only).
+
+    - GET: Stream every order item as CSV (default) or ``?output=ndjson``.
+      Pass ``since`` (ISO 8601) to export only orders updated since then.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """
+        Stream the order export.
+        """
+        return export_response(request, 'orders')
+
+class OrderBulkStatus(APIView):
+    """
+    API endpoint for moving a batch of orders to one status (staff only).
+
+    - POST: ``{"ids": [...], "status": "S"}``. Orders whose current status
+      cannot move to ``status`` (see ``Order.STATUS_TRANSITIONS``) and
+      unknown ids are reported without blocking the others. Notifications
+      for shipped and delivered orders are queued, not sent inline.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        """
+        Apply the transition with a single UPDATE.
+        """
+        serializer = OrderStatusTransitionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+        new_status = serializer.validated_data['status']
+        sources = [
+            code for code, targets in Order.STATUS_TRANSITIONS.items() if new_status in targets
+        ]
+        labels = dict(Order.ORDER_STATUS)
+
+        with transaction.atomic():
+            # Locked in id order, like every other batch writer.
+            current = {
+                row['id']: row
+                for row in rollup_values(
+                    Order.objects.select_for_update().filter(pk__in=ids).order_by('pk')
+                )
+            }
+            moving = [row for row in current.values() if row['status'] in sources]
+            if moving:
+                Order.objects.filter(pk__in=[row['id'] for row in moving]).update(
+                    status=new_status, updated_at=timezone.now()
+                )
+                record_status_change(moving, new_status)
+                if new_status in ('S', 'D'):
+                    run_in_background(notify_orders, [row['id'] for row in moving])
+
+        results = []
+        for order_id in ids:
+            row = current.get(order_id)
+            if row is None:
+                results.append({'id': order_id, 'status': 'not_found'})
+            elif row['status'] in sources:
+                results.append({'id': order_id, 'status': 'updated'})
+            else:
+                results.append({'id': order_id, 'status': 'invalid', 'errors': {'status': [
+                    f"Cannot move from {labels[row['status']]} to {labels[new_status]}."
+                ]}})
+        logger.info(
+            f"Bulk status change of {len(moving)} orders to {new_status} by {request.user.username}",
+            extra={'user': request.user.username, 'status': new_status, 'updated': len(moving)}
+        )
+        return Response({'updated': len(moving), 'results': results})
+
+class SalesAnalytics(APIView):
+    """
+    API endpoint for sales dashboards (staff only), read from the rollups.
+
+    - GET: Revenue per day, orders per status and top products. Optional
+      ``start`` and ``end`` days (YYYY-MM-DD, inclusive) limit the daily
+      figures; ``top`` (max 100) and ``rank`` (``revenue`` or ``units``)
+      shape the product list.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """
+        Return the sales summary.
+        """
+        bounds = {}
+        for name in ('start', 'end'):
+            value = request.query_params.get(name)
+            if value:
+                try:
+                    bounds[name] = parse_date(value)
+                except ValueError:
+                    bounds[name] = None
+                if bounds[name] is None:
+                    raise exceptions.ValidationError({name: "Enter a date as YYYY-MM-DD."})
+        rank = request.query_params.get('rank', 'revenue')
+        if rank not in ('revenue', 'units'):
+            raise exceptions.ValidationError({'rank': "Choose one of: revenue, units."})
+        try:
+            top = min(max(int(request.query_params.get('top', 10)), 1), 100)
+        except ValueError:
+            raise exceptions.ValidationError({'top': "Enter a whole number."})
+        return Response(sales_summary(top=top, rank=rank, **bounds))
+
 class OrderDetail(generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint for retrieving, updating, or deleting an order.
 
-    - GET: Retrieve order details
+    - GET: Retrieve order details; ``include_archived=1`` also looks in
+      the archive
     - PUT: Update order and send notifications on status change
     - DELETE: Delete order
     """
@@ -250,9 +824,10 @@ class OrderDetail(generics.RetrieveUpdateDestroyAPIView):
         Return orders for the current user, or all if staff.
         """
         user = self.request.user
+        orders = Order.objects.for_listing()
         if user.is_staff:
-            return Order.objects.all()
-        return Order.objects.filter(customer__user=user)
+            return orders
+        return orders.filter(customer__user=user)
     
     def get_object(self, pk):
         """
@@ -260,13 +835,36 @@ class OrderDetail(generics.RetrieveUpdateDestroyAPIView):
         """
         queryset = self.get_queryset()
         return get_object_or_404(queryset, pk=pk)
+
+    def get_archived_queryset(self):
+        """
+        Return archived orders for the current user, or all if staff.
+        """
+        user = self.request.user
+        if user.is_staff:
+            return ArchivedOrder.objects.all()
+        return ArchivedOrder.objects.filter(customer__user=user)
+
+    def get_archived(self, pk, fields):
+        """
+        Helper to render an archived order, or return None if there is none.
+        """
+        rows = ArchivedOrderRows(fields=fields)
+        found = rows.render(rows.values(self.get_archived_queryset().filter(pk=pk)))
+        return found[0] if found else None
     
     def get(self, request, pk):
         """
         Retrieve a single order.
         """
+        fields = get_sparse_fields(request, self.serializer_class)
+        if query_flag(request, 'include_archived'):
+            archived = self.get_archived(pk, fields)
+            if archived is not None:
+                return Response(archived)
         try:
-            order = self.get_object(pk)
+            queryset = narrow_queryset(self.get_queryset(), fields, self.serializer_class)
+            order = get_object_or_404(queryset, pk=pk)
             logger.info(
                 f"Order #{order.id} accessed by {request.user.username}",
                 extra={
@@ -275,7 +873,7 @@ class OrderDetail(generics.RetrieveUpdateDestroyAPIView):
                     'customer': order.customer.user.username
                 }
             )
-            serializer = self.serializer_class(order)
+            serializer = self.serializer_class(order, fields=fields)
             return Response(serializer.data)
         except Exception as e:
             logger.error(
@@ -303,7 +901,12 @@ class OrderDetail(generics.RetrieveUpdateDestroyAPIView):
             serializer = self.serializer_class(order, data=request.data)
             
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    # Re-read under a lock so the rollups move the right status.
+                    previous = rollup_values(Order.objects.select_for_update().filter(pk=order.pk))
+                    serializer.save()
+                    record_status_change(previous, order.status)
+                old_status = previous[0]['status']
                 new_status = serializer.data['status']
                 
                 # Log status change and send notifications if needed
@@ -375,7 +978,9 @@ class OrderDetail(generics.RetrieveUpdateDestroyAPIView):
                     'order_status': order.status
                 }
             )
-            order.delete()
+            with transaction.atomic():
+                record_deleted_orders(rollup_values(Order.objects.select_for_update().filter(pk=order.pk)))
+                order.delete()
             logger.warning(
                 f"Order #{order.id} successfully deleted",
                 extra={
@@ -420,7 +1025,7 @@ class CartView(generics.ListCreateAPIView):
         """
         Retrieve the user's cart.
         """
-        cart = self.get_cart(request.user)
+        cart = prefetch_cart(self.get_cart(request.user))
         serializer = self.serializer_class(cart)
         return Response(serializer.data)
 
@@ -454,7 +1059,7 @@ class AddToCartView(generics.ListCreateAPIView):
             cart_item.quantity += int(quantity)
             cart_item.save()
         
-        serializer = self.serializer_class(cart)
+        serializer = self.serializer_class(prefetch_cart(cart))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 class RemoveFromCartView(generics.ListCreateAPIView):
@@ -477,7 +1082,7 @@ class RemoveFromCartView(generics.ListCreateAPIView):
         cart_item = get_object_or_404(CartItem, cart=cart, product_id=product_id)
         cart_item.delete()
         
-        serializer = self.serializer_class(cart)
+        serializer = self.serializer_class(prefetch_cart(cart))
         return Response(serializer.data)
 
 class UpdateCartItemView(APIView):
@@ -508,7 +1113,7 @@ class UpdateCartItemView(APIView):
         cart_item.quantity = quantity
         cart_item.save()
         
-        serializer = CartSerializer(cart)
+        serializer = CartSerializer(prefetch_cart(cart))
         return Response(serializer.data)
 
 class CheckoutView(generics.ListCreateAPIView):
@@ -520,120 +1125,28 @@ class CheckoutView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = OrderSerializer
     
+    @idempotent
     def post(self, request):
         """
         Checkout the cart: create an order, clear cart, send notifications.
         """
-        customer = Customer.objects.get(user=request.user)
+        customer = Customer.objects.select_related('user').get(user=request.user)
         cart = get_object_or_404(Cart, customer=customer)
-        
-        if cart.items.count() == 0:
-            logger.warning(
-                f"Empty cart checkout attempted by {request.user.username}",
-                extra={
-                    'user': request.user.username,
-                    'customer': customer.user.username,
-                    'cart_id': cart.id
-                }
-            )
-            return Response(
-                {"error": "Your cart is empty"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
+        # Avoids a lookup per notification.
+        cart.customer = customer
+
         try:
-            # Log cart contents before checkout
-            logger.info(
-                f"Starting checkout process for cart {cart.id}",
+            order = checkout(cart, request.data.get('shipping_address', ''))
+        except CheckoutError as e:
+            logger.warning(
+                f"Checkout rejected for {request.user.username}: {e}",
                 extra={
                     'user': request.user.username,
-                    'customer': customer.user.username,
-                    'cart_items': [
-                        {
-                            'product': item.product.name,
-                            'quantity': item.quantity,
-                            'price': item.product.price
-                        } 
-                        for item in cart.items.all()
-                    ],
-                    'cart_total': cart.total
-                }
-            )
-            
-            # Create order from cart
-            order = Order.objects.create(
-                customer=customer,
-                shipping_address=request.data.get('shipping_address', ''),
-                status='P'
-            )
-            
-            # Log order creation
-            logger.info(
-                f"Order #{order.id} created from cart {cart.id}",
-                extra={
-                    'order_id': order.id,
-                    'customer': customer.user.username,
-                    'initial_status': order.status,
-                    'shipping_address': order.shipping_address
-                }
-            )
-            
-            # Transfer cart items to order items
-            for cart_item in cart.items.all():
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.price * cart_item.quantity
-                )
-                logger.debug(
-                    f"Order item added to order #{order.id}",
-                    extra={
-                        'order_id': order.id,
-                        'product': cart_item.product.name,
-                        'quantity': cart_item.quantity,
-                        'price': cart_item.product.price
-                    }
-                )
-            
-            # Calculate total
-            order.total = sum(item.price * item.quantity for item in order.items.all())
-            order.save()
-            
-            # Log order total
-            logger.info(
-                f"Order #{order.id} total calculated",
-                extra={
-                    'order_id': order.id,
-                    'total': order.total,
-                    'item_count': order.items.count()
-                }
-            )
-            
-            # Clear the cart
-            cart.items.all().delete()
-            logger.info(
-                f"Cart {cart.id} cleared after checkout",
-                extra={
                     'cart_id': cart.id,
-                    'customer': customer.user.username
-                }
-            )
-            
-            # Send notifications
-            send_order_notifications(order)
-            logger.info(
-                f"Notifications sent for order #{order.id}",
-                extra={
-                    'order_id': order.id,
-                    'customer': customer.user.username,
-                    'notification_types': ['email', 'sms']
+                    'error': str(e)
                 }
             )
-            
-            serializer = self.serializer_class(order)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(
                 f"Checkout failed for user {request.user.username}",
@@ -650,6 +1163,9 @@ class CheckoutView(generics.ListCreateAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        serializer = self.serializer_class(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 class SMSTestView(APIView):
     """
     API endpoint for testing SMS sending via Africa's Talking.
@@ -689,3 +1205,26 @@ class SMSTestView(APIView):
                 'message': 'Failed to send SMS',
                 'error': str(e)
             }, status=400)
+
+
+def serve_product_media(request, path):
+    """
+    Serve a product image or variant from the product media storage.
+
+    Content-hashed files never change, so they are streamed with a
+    far-future immutable Cache-Control header, with or without DEBUG;
+    clients and CDNs then fetch each file once. Any other name under
+    products/ (uploads from before content addressing) is only served in
+    development, through Django's static serve, and is a 404 otherwise.
+    """
+    if not is_content_addressed(path):
+        if settings.DEBUG:
+            return serve(request, path, document_root=settings.MEDIA_ROOT)
+        raise Http404("Media file not found")
+    try:
+        handle = get_product_media_storage().open(path)
+    except (FileNotFoundError, SuspiciousFileOperation):
+        raise Http404("Media file not found")
+    response = FileResponse(handle)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response